@@ -1,6 +1,11 @@
 import jwt
+import hmac
+import hashlib
 import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime, timedelta
+from bson import ObjectId
 from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
@@ -9,38 +14,168 @@ import bcrypt
 from api.models import User
 
 SECRET_KEY = settings.SECRET_KEY
+BCRYPT_ROUNDS = getattr(settings, 'BCRYPT_ROUNDS', 12)
 
-# Thread-safe MongoEngine initialization
-_mongo_init_lock = threading.Lock()
+# JWT signing. HS256 goes through hashlib, i.e. OpenSSL's EVP SHA-256 (SHA-NI
+# accelerated where available). EdDSA uses an Ed25519 key pair via cryptography,
+# so verifying services only need the public key.
+JWT_ALGORITHM = getattr(settings, 'JWT_ALGORITHM', 'HS256')
+JWT_ALGORITHMS = [JWT_ALGORITHM]
+if JWT_ALGORITHM == 'EdDSA':
+    JWT_SIGNING_KEY = settings.JWT_PRIVATE_KEY
+    JWT_VERIFYING_KEY = settings.JWT_PUBLIC_KEY
+else:
+    JWT_SIGNING_KEY = JWT_VERIFYING_KEY = SECRET_KEY
+
+# Validated-token cache: token -> (user, expires_at)
+# Only successful validations are cached. Entries expire at the token's own
+# exp claim or after TOKEN_CACHE_TTL seconds, whichever comes first.
+TOKEN_CACHE_TTL = 300
+TOKEN_CACHE_MAXSIZE = 10000
+_token_cache = {}
+_token_cache_lock = threading.Lock()
+
+# Verified-password cache: bcrypt hash -> HMAC-SHA256(SECRET_KEY, password)
+# Filled only after a successful bcrypt check and kept in memory only, so the
+# bcrypt hash remains the sole credential stored at rest.
+PASSWORD_CACHE_MAXSIZE = 10000
+_password_cache = {}
+_password_cache_lock = threading.Lock()
+
+# Coalesced user lookups for cold tokens: user_id -> Future
+# The first caller resolves the queue with one $in query; callers arriving while
+# a fetch is running join the next batch instead of issuing their own query.
+# A fetcher runs a single batch and returns; a waiter still queued after it
+# finishes leads the next batch, so no request serves other callers' lookups
+# indefinitely.
+_queued_user_fetches = {}
+_inflight_user_fetches = {}
+_user_fetch_lock = threading.Lock()
+_user_fetch_done = threading.Condition(_user_fetch_lock)
+_user_fetch_active = False
+
+# Per-thread MongoEngine initialization (state is thread-local, so no lock needed)
+_thread_state = threading.local()
 
 def _ensure_mongo_thread_init():
     """Ensure MongoEngine is properly initialized for current thread"""
-    with _mongo_init_lock:
-        import mongoengine
-        try:
-            # Initialize thread locals if not already done
-            from mongoengine.context_managers import thread_locals
-            if not hasattr(thread_locals, 'no_dereferencing_class'):
-                thread_locals.no_dereferencing_class = ''
-        except:
-            pass
+    if getattr(_thread_state, 'mongo_initialized', False):
+        return
+    try:
+        # Initialize thread locals if not already done
+        from mongoengine.context_managers import thread_locals
+        if not hasattr(thread_locals, 'no_dereferencing_class'):
+            thread_locals.no_dereferencing_class = ''
+    except:
+        pass
+    _thread_state.mongo_initialized = True
 
 def hash_password(password):
-    """Hash password using bcrypt with secure salt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash password using bcrypt with secure salt and configured work factor"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+def _password_digest(password):
+    """Keyed SHA-256 digest of a password (in-memory use only)"""
+    return hmac.new(SECRET_KEY.encode('utf-8'), password.encode('utf-8'), hashlib.sha256).digest()
 
 def verify_password(password, hashed):
-    """Verify password against bcrypt hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    """Verify password against bcrypt hash, skipping bcrypt for recently verified credentials"""
+    digest = _password_digest(password)
+    cached = _password_cache.get(hashed)
+    if cached is not None and hmac.compare_digest(cached, digest):
+        return True
+    
+    if not bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')):
+        return False
+    
+    with _password_cache_lock:
+        if len(_password_cache) >= PASSWORD_CACHE_MAXSIZE:
+            _password_cache.pop(next(iter(_password_cache)))
+        _password_cache[hashed] = digest
+    return True
+
+def _get_cached_user(token):
+    """Return the cached user for a previously validated token, or None"""
+    entry = _token_cache.get(token)
+    if entry is None:
+        return None
+    user, expires_at = entry
+    if expires_at <= time.time():
+        with _token_cache_lock:
+            _token_cache.pop(token, None)
+        return None
+    return user
+
+def _cache_user(token, user, exp):
+    """Cache a validated token until min(exp, now + TOKEN_CACHE_TTL)"""
+    now = time.time()
+    expires_at = min(float(exp), now + TOKEN_CACHE_TTL)
+    with _token_cache_lock:
+        if len(_token_cache) >= TOKEN_CACHE_MAXSIZE:
+            # Purge expired entries first, then evict oldest if still full
+            for key in [k for k, (_, e) in _token_cache.items() if e <= now]:
+                del _token_cache[key]
+            if len(_token_cache) >= TOKEN_CACHE_MAXSIZE:
+                _token_cache.pop(next(iter(_token_cache)))
+        _token_cache[token] = (user, expires_at)
+
+def _run_user_fetch_batch():
+    """Resolve the currently queued user lookups with one query, then hand off to the next leader"""
+    global _user_fetch_active
+    with _user_fetch_lock:
+        batch = dict(_queued_user_fetches)
+        _queued_user_fetches.clear()
+        _inflight_user_fetches.update(batch)
+    
+    try:
+        valid_ids = [uid for uid in batch if ObjectId.is_valid(uid)]
+        users = {str(u.id): u for u in User.objects(id__in=valid_ids)} if valid_ids else {}
+        for uid, future in batch.items():
+            future.set_result(users.get(uid))
+    except Exception as e:
+        for future in batch.values():
+            if not future.done():
+                future.set_exception(e)
+    finally:
+        with _user_fetch_done:
+            for uid, future in batch.items():
+                _inflight_user_fetches.pop(uid, None)
+                if not future.done():
+                    future.set_exception(RuntimeError('User lookup aborted'))
+            _user_fetch_active = False
+            _user_fetch_done.notify_all()
+
+def _fetch_user(user_id):
+    """Fetch a user by id, coalescing concurrent lookups into one query"""
+    global _user_fetch_active
+    user_id = str(user_id)
+    with _user_fetch_done:
+        future = _inflight_user_fetches.get(user_id) or _queued_user_fetches.get(user_id)
+        if future is None:
+            future = Future()
+            _queued_user_fetches[user_id] = future
+        
+        # Wait for the result, unless no fetch is running while this id is
+        # still queued; then this caller runs the next batch
+        while not future.done() and (_user_fetch_active or user_id not in _queued_user_fetches):
+            _user_fetch_done.wait()
+        is_fetcher = not future.done()
+        if is_fetcher:
+            _user_fetch_active = True
+    
+    if is_fetcher:
+        _run_user_fetch_batch()
+    return future.result()
 
 def generate_token(user_id):
     """Generate JWT token with 30-day expiration"""
+    now = datetime.utcnow()
     payload = {
         'user_id': str(user_id),
-        'exp': datetime.utcnow() + timedelta(days=30),
-        'iat': datetime.utcnow()
+        'exp': now + timedelta(days=30),
+        'iat': now
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
+    return jwt.encode(payload, JWT_SIGNING_KEY, algorithm=JWT_ALGORITHM)
 
 class JWTAuthentication(BaseAuthentication):
     """JWT-based authentication for API endpoints"""
@@ -59,12 +194,17 @@ class JWTAuthentication(BaseAuthentication):
         except ValueError:
             raise AuthenticationFailed('Invalid authorization header format')
         
+        # Fast path: token already verified and user already loaded
+        cached_user = _get_cached_user(token)
+        if cached_user is not None:
+            return (cached_user, None)
+        
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            try:
-                user = User.objects.get(id=payload['user_id'])
-            except User.DoesNotExist:
+            payload = jwt.decode(token, JWT_VERIFYING_KEY, algorithms=JWT_ALGORITHMS)
+            user = _fetch_user(payload['user_id'])
+            if user is None:
                 raise AuthenticationFailed('User not found')
+            _cache_user(token, user, payload['exp'])
             return (user, None)
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed('Token has expired. Please login again.')
@@ -11,8 +11,15 @@ Risk Formula:
     District Risk = Weighted average of City risks
 """
 
+import copy
+import functools
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
+from operator import itemgetter
+import numpy as np
+from pymongo import UpdateOne
 from api.models import Patient, RiskScore
 
 logger = logging.getLogger(__name__)
@@ -26,10 +33,93 @@ PHC_CITY_MAPPING = {
     'PHC_5': 'Kinathukadavu'
 }
 
+# City to PHCs (inverse mapping, built once at import)
+CITY_TO_PHCS = {}
+for _phc_id, _city in PHC_CITY_MAPPING.items():
+    CITY_TO_PHCS.setdefault(_city, []).append(_phc_id)
+
+# All cities in stable mapping order
+ALL_CITIES = tuple(CITY_TO_PHCS.keys())
+
 DISTRICT_ID = 'Coimbatore'
 
 
-def calculate_phc_risk_score(phc_id, time_window_days=7):
+# Short-lived result cache for dashboard refreshes: data only changes as
+# patients arrive, so recomputing (and rewriting RiskScore) on every hit is waste
+RISK_CACHE_TTL = 30  # seconds
+RISK_CACHE_MAXSIZE = 256
+_risk_cache = {}
+_risk_cache_lock = threading.Lock()
+
+
+def _ttl_cached(func):
+    """
+    Cache a risk calculation result for RISK_CACHE_TTL seconds.
+    
+    Results containing 'error' are never cached. Calls with unhashable
+    arguments (e.g. a shared phc_cache or pending_writes batch) bypass the cache.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+        
+        now = time.monotonic()
+        entry = _risk_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return copy.deepcopy(entry[1])
+        
+        result = func(*args, **kwargs)
+        if 'error' not in result:
+            with _risk_cache_lock:
+                if len(_risk_cache) >= RISK_CACHE_MAXSIZE:
+                    for k in [k for k, (exp, _) in _risk_cache.items() if exp <= now]:
+                        del _risk_cache[k]
+                    if len(_risk_cache) >= RISK_CACHE_MAXSIZE:
+                        _risk_cache.pop(next(iter(_risk_cache)))
+                _risk_cache[key] = (now + RISK_CACHE_TTL, copy.deepcopy(result))
+        return result
+    return wrapper
+
+
+def _weighted_average(scores, weights):
+    """Patient-count weighted average of risk scores (vectorized)"""
+    weights = np.asarray(weights, dtype=np.float64)
+    total = weights.sum()
+    if total == 0:
+        return 0.0
+    return float(np.dot(np.asarray(scores, dtype=np.float64), weights) / total)
+
+
+def _risk_score_upsert(filters, values):
+    """Build a RiskScore upsert operation for a batched bulk_write"""
+    now = datetime.utcnow()
+    return UpdateOne(
+        filters,
+        {'$set': {**values, 'updated_at': now}, '$setOnInsert': {'computed_at': now}},
+        upsert=True
+    )
+
+
+def _flush_risk_score_writes(pending_writes):
+    """Apply queued RiskScore upserts in a single round-trip"""
+    if pending_writes:
+        RiskScore._get_collection().bulk_write(pending_writes, ordered=False)
+
+
+def _store_risk_score(operation, pending_writes=None):
+    """Queue a RiskScore upsert when batching, otherwise apply it immediately"""
+    if pending_writes is not None:
+        pending_writes.append(operation)
+    else:
+        _flush_risk_score_writes([operation])
+
+
+@_ttl_cached
+def calculate_phc_risk_score(phc_id, time_window_days=7, pending_writes=None):
     """
     Calculate PHC-level risk score using composite formula.
     
@@ -38,7 +128,8 @@ def calculate_phc_risk_score(phc_id, time_window_days=7):
     Args:
         phc_id: PHC identifier (e.g., 'PHC_1')
         time_window_days: Look back period (default 7 days)
-        
+        pending_writes: Optional list to queue the RiskScore upsert on instead of writing now
+    
     Returns:
         dict: Risk score breakdown
     """
@@ -46,13 +137,19 @@ def calculate_phc_risk_score(phc_id, time_window_days=7):
         # Get time window
         cutoff_date = datetime.utcnow() - timedelta(days=time_window_days)
         
-        # Get patients from PHC in time window
-        patients = Patient.objects.filter(
-            phc_id=phc_id,
-            created_at__gte=cutoff_date
-        )
+        # Count totals, high-severity and diseased patients in one pipeline
+        counts = list(Patient.objects.aggregate([
+            {'$match': {'phc_id': phc_id, 'created_at': {'$gte': cutoff_date}}},
+            {'$group': {
+                '_id': None,
+                'total': {'$sum': 1},
+                'high_severity': {'$sum': {'$cond': [{'$eq': ['$severity_level', 'High']}, 1, 0]}},
+                'disease': {'$sum': {'$cond': [{'$ne': ['$disease_label', 'Healthy']}, 1, 0]}}
+            }}
+        ]))
+        counts = counts[0] if counts else {'total': 0, 'high_severity': 0, 'disease': 0}
         
-        total_patients = patients.count()
+        total_patients = counts['total']
         
         if total_patients == 0:
             return {
@@ -69,11 +166,11 @@ def calculate_phc_risk_score(phc_id, time_window_days=7):
         # Calculate component percentages
         
         # 1. High Severity Percentage
-        high_severity_count = patients.filter(severity_level='High').count()
+        high_severity_count = counts['high_severity']
         high_severity_pct = (high_severity_count / total_patients) * 100
         
         # 2. Outbreak Flag Percentage (disease cases)
-        disease_count = patients.filter(disease_label__ne='Healthy').count()
+        disease_count = counts['disease']
         outbreak_flag_pct = (disease_count / total_patients) * 100
         
         # 3. Disease Prevalence Percentage
@@ -91,33 +188,18 @@ def calculate_phc_risk_score(phc_id, time_window_days=7):
         
         city = PHC_CITY_MAPPING.get(phc_id, 'Unknown')
         
-        # Store in database
-        risk_record = RiskScore.objects(
-            phc_id=phc_id,
-            district_id=DISTRICT_ID,
-            evaluation_period='daily'
-        ).first()
-        
-        if risk_record:
-            risk_record.phc_risk_score = phc_risk_score
-            risk_record.high_severity_percentage = high_severity_pct
-            risk_record.outbreak_flag_percentage = outbreak_flag_pct
-            risk_record.disease_prevalence_percentage = disease_prevalence_pct
-            risk_record.patient_count = total_patients
-            risk_record.updated_at = datetime.utcnow()
-            risk_record.save()
-        else:
-            RiskScore.objects.create(
-                phc_id=phc_id,
-                city=city,
-                district_id=DISTRICT_ID,
-                phc_risk_score=phc_risk_score,
-                high_severity_percentage=high_severity_pct,
-                outbreak_flag_percentage=outbreak_flag_pct,
-                disease_prevalence_percentage=disease_prevalence_pct,
-                patient_count=total_patients,
-                evaluation_period='daily'
-            )
+        # Store in database (atomic upsert, queued when batching)
+        _store_risk_score(_risk_score_upsert(
+            {'phc_id': phc_id, 'district_id': DISTRICT_ID, 'evaluation_period': 'daily'},
+            {
+                'city': city,
+                'phc_risk_score': phc_risk_score,
+                'high_severity_percentage': high_severity_pct,
+                'outbreak_flag_percentage': outbreak_flag_pct,
+                'disease_prevalence_percentage': disease_prevalence_pct,
+                'patient_count': total_patients
+            }
+        ), pending_writes)
         
         return {
             'phc_id': phc_id,
@@ -129,13 +211,14 @@ def calculate_phc_risk_score(phc_id, time_window_days=7):
             'patient_count': total_patients,
             'calculated_at': datetime.utcnow().isoformat()
         }
-        
+    
     except Exception as e:
         logger.error(f"Error calculating PHC risk for {phc_id}: {str(e)}")
         return {'error': str(e), 'phc_id': phc_id}
 
 
-def calculate_city_risk_score(city, time_window_days=7):
+@_ttl_cached
+def calculate_city_risk_score(city, time_window_days=7, phc_cache=None, pending_writes=None):
     """
     Calculate city-level risk as weighted average of PHC risks.
     
@@ -144,13 +227,15 @@ def calculate_city_risk_score(city, time_window_days=7):
     Args:
         city: City name (e.g., 'Pollachi')
         time_window_days: Look back period
-        
+        phc_cache: Optional dict of phc_id -> PHC risk result, reused across calls
+        pending_writes: Optional list to queue RiskScore upserts on instead of writing now
+    
     Returns:
         dict: City risk score breakdown
     """
     try:
         # Get all PHCs in this city
-        phc_ids = [phc for phc, c in PHC_CITY_MAPPING.items() if c == city]
+        phc_ids = CITY_TO_PHCS.get(city, [])
         
         if not phc_ids:
             return {
@@ -165,7 +250,11 @@ def calculate_city_risk_score(city, time_window_days=7):
         total_patients = 0
         
         for phc_id in phc_ids:
-            phc_data = calculate_phc_risk_score(phc_id, time_window_days)
+            phc_data = phc_cache.get(phc_id) if phc_cache is not None else None
+            if phc_data is None:
+                phc_data = calculate_phc_risk_score(phc_id, time_window_days, pending_writes)
+                if phc_cache is not None:
+                    phc_cache[phc_id] = phc_data
             if 'error' not in phc_data:
                 phc_risks.append(phc_data)
                 total_patients += phc_data['patient_count']
@@ -180,34 +269,18 @@ def calculate_city_risk_score(city, time_window_days=7):
             }
         
         # Weighted average by patient count
-        city_risk_score = 0.0
-        for phc_data in phc_risks:
-            weight = phc_data['patient_count'] / total_patients
-            city_risk_score += phc_data['phc_risk_score'] * weight
+        city_risk_score = _weighted_average(
+            list(map(itemgetter('phc_risk_score'), phc_risks)),
+            list(map(itemgetter('patient_count'), phc_risks))
+        )
         
         city_risk_score = min(city_risk_score, 1.0)
         
-        # Store in database
-        risk_record = RiskScore.objects(
-            city=city,
-            district_id=DISTRICT_ID,
-            phc_id=None,
-            evaluation_period='daily'
-        ).first()
-        
-        if risk_record:
-            risk_record.city_risk_score = city_risk_score
-            risk_record.patient_count = total_patients
-            risk_record.updated_at = datetime.utcnow()
-            risk_record.save()
-        else:
-            RiskScore.objects.create(
-                city=city,
-                district_id=DISTRICT_ID,
-                city_risk_score=city_risk_score,
-                patient_count=total_patients,
-                evaluation_period='daily'
-            )
+        # Store in database (atomic upsert, queued when batching)
+        _store_risk_score(_risk_score_upsert(
+            {'city': city, 'district_id': DISTRICT_ID, 'phc_id': None, 'evaluation_period': 'daily'},
+            {'city_risk_score': city_risk_score, 'patient_count': total_patients}
+        ), pending_writes)
         
         return {
             'city': city,
@@ -217,40 +290,47 @@ def calculate_city_risk_score(city, time_window_days=7):
             'phc_breakdown': phc_risks,
             'calculated_at': datetime.utcnow().isoformat()
         }
-        
+    
     except Exception as e:
         logger.error(f"Error calculating city risk for {city}: {str(e)}")
         return {'error': str(e), 'city': city}
 
 
+@_ttl_cached
 def calculate_district_risk_score(district_id, time_window_days=7):
     """
     Calculate district-level risk as weighted average of city risks.
     
     District Risk = Weighted average of City risks
     
+    PHC results are computed once and shared across the city rollups, and all
+    PHC/City/District RiskScore writes are flushed in a single bulk_write.
+    
     Args:
         district_id: District identifier
         time_window_days: Look back period
-        
+    
     Returns:
         dict: District risk score breakdown
     """
     try:
         # Get all cities
-        cities = list(set(PHC_CITY_MAPPING.values()))
+        cities = ALL_CITIES
         
         # Calculate city risk scores
         city_risks = []
         total_patients = 0
+        phc_cache = {}
+        pending_writes = []
         
         for city in cities:
-            city_data = calculate_city_risk_score(city, time_window_days)
+            city_data = calculate_city_risk_score(city, time_window_days, phc_cache, pending_writes)
             if 'error' not in city_data:
                 city_risks.append(city_data)
                 total_patients += city_data['total_patients']
         
         if not city_risks or total_patients == 0:
+            _flush_risk_score_writes(pending_writes)
             return {
                 'district_id': district_id,
                 'district_risk_score': 0.0,
@@ -259,33 +339,19 @@ def calculate_district_risk_score(district_id, time_window_days=7):
             }
         
         # Weighted average by patient count
-        district_risk_score = 0.0
-        for city_data in city_risks:
-            weight = city_data['total_patients'] / total_patients
-            district_risk_score += city_data['city_risk_score'] * weight
+        district_risk_score = _weighted_average(
+            list(map(itemgetter('city_risk_score'), city_risks)),
+            list(map(itemgetter('total_patients'), city_risks))
+        )
         
         district_risk_score = min(district_risk_score, 1.0)
         
-        # Store in database
-        risk_record = RiskScore.objects(
-            district_id=district_id,
-            phc_id=None,
-            city=None,
-            evaluation_period='daily'
-        ).first()
-        
-        if risk_record:
-            risk_record.district_risk_score = district_risk_score
-            risk_record.patient_count = total_patients
-            risk_record.updated_at = datetime.utcnow()
-            risk_record.save()
-        else:
-            RiskScore.objects.create(
-                district_id=district_id,
-                district_risk_score=district_risk_score,
-                patient_count=total_patients,
-                evaluation_period='daily'
-            )
+        # Store in database (together with the queued PHC and city records)
+        pending_writes.append(_risk_score_upsert(
+            {'district_id': district_id, 'phc_id': None, 'city': None, 'evaluation_period': 'daily'},
+            {'district_risk_score': district_risk_score, 'patient_count': total_patients}
+        ))
+        _flush_risk_score_writes(pending_writes)
         
         return {
             'district_id': district_id,
@@ -295,12 +361,20 @@ def calculate_district_risk_score(district_id, time_window_days=7):
             'city_breakdown': city_risks,
             'calculated_at': datetime.utcnow().isoformat()
         }
-        
+    
     except Exception as e:
         logger.error(f"Error calculating district risk: {str(e)}")
         return {'error': str(e), 'district_id': district_id}
 
 
+# Severity thresholds: [0, 0.25) LOW, [0.25, 0.50) MEDIUM, [0.50, 0.75) HIGH, >= 0.75 CRITICAL
+# Plain floats for the scalar path (comparing against numpy scalars boxes on
+# every call); the array copy feeds np.digitize in the vectorized path
+RISK_SEVERITY_THRESHOLDS = (0.25, 0.50, 0.75)
+RISK_SEVERITY_BINS = np.array(RISK_SEVERITY_THRESHOLDS)
+RISK_SEVERITY_LABELS = np.array(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'])
+
+
 def get_risk_severity_level(risk_score):
     """
     Convert risk score to severity level.
@@ -311,11 +385,24 @@ def get_risk_severity_level(risk_score):
     Returns:
         str: 'LOW', 'MEDIUM', 'HIGH', or 'CRITICAL'
     """
-    if risk_score < 0.25:
+    if risk_score < RISK_SEVERITY_THRESHOLDS[0]:
         return 'LOW'
-    elif risk_score < 0.50:
+    elif risk_score < RISK_SEVERITY_THRESHOLDS[1]:
         return 'MEDIUM'
-    elif risk_score < 0.75:
+    elif risk_score < RISK_SEVERITY_THRESHOLDS[2]:
         return 'HIGH'
     else:
         return 'CRITICAL'
+
+
+def get_risk_severity_levels(risk_scores):
+    """
+    Vectorized get_risk_severity_level for many scores at once.
+    
+    Args:
+        risk_scores: Sequence or numpy array of risk scores 0-1
+        
+    Returns:
+        numpy array of 'LOW', 'MEDIUM', 'HIGH', or 'CRITICAL'
+    """
+    return RISK_SEVERITY_LABELS[np.digitize(np.asarray(risk_scores, dtype=np.float64), RISK_SEVERITY_BINS)]
@@ -2,18 +2,22 @@
 Django management command for periodic federated training cycle.
 
 Usage:
-    python manage.py federated_training_cycle [--aggressive]
+    python manage.py federated_training_cycle [--aggressive] [--workers N]
 
 Options:
     --aggressive: Train all PHCs regardless of thresholds (once per 24h max)
+    --workers: Number of processes used for local training (default: one per PHC)
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand
 from api.models import Patient, LocalModel
 from api.ml_utils import (
     should_trigger_local_training,
     should_trigger_global_aggregation,
     train_federated_model,
+    run_post_training_analytics,
     try_automatic_aggregation,
     get_latest_global_model
 )
@@ -22,6 +26,41 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _init_worker(n_jobs):
+    """Give each training worker process its own Django setup, MongoDB connection and CPU share"""
+    import django
+    import mongoengine
+    from django.apps import apps
+    from django.conf import settings
+    
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fedhealth.settings')
+    if not apps.ready:
+        django.setup()
+    
+    # MongoClient is not fork-safe: drop the inherited client and reconnect
+    mongoengine.disconnect()
+    mongoengine.connect('fedhealth', host=settings.MONGO_DB_URL)
+    
+    # Concurrent fits split the cores instead of each asking for all of them
+    from api import ml_utils
+    ml_utils.TRAINING_N_JOBS = n_jobs
+
+
+def _run_local_training(phc_id):
+    """Check trigger and train a single PHC (runs in a worker process)"""
+    should_train, trigger_reason = should_trigger_local_training(phc_id)
+    patient_count = Patient.objects.filter(phc_id=phc_id).count()
+    
+    result = None
+    if should_train:
+        # Aggregation runs once in PHASE 2 and analytics once for all PHCs after training
+        result = train_federated_model(
+            phc_id, trigger_reason=trigger_reason, auto_aggregate=False, run_analytics=False
+        )
+    
+    return phc_id, patient_count, should_train, trigger_reason, result
+
+
 class Command(BaseCommand):
     help = 'Run federated training cycle for all PHCs with proper versioning'
 
@@ -31,6 +70,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Train all PHCs with sufficient data',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of processes for local training (default: one per PHC, 1 = sequential)',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting federated training cycle...'))
@@ -43,17 +88,30 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING('\n[PHASE 1] LOCAL TRAINING'))
         self.stdout.write("-"*70)
         
-        for phc_id in phc_ids:
-            should_train, trigger_reason = should_trigger_local_training(phc_id)
-            patient_count = Patient.objects.filter(phc_id=phc_id).count()
-            
+        # Each PHC trains on disjoint data, so fits run in parallel processes
+        workers = options.get('workers') or len(phc_ids)
+        if workers > 1:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(threads_per_worker,)
+            ) as executor:
+                local_results = list(executor.map(_run_local_training, phc_ids))
+        else:
+            local_results = [_run_local_training(phc_id) for phc_id in phc_ids]
+        
+        # Drift and risk analytics for every trained PHC in one batched pass
+        ml_insights_by_phc = run_post_training_analytics([
+            phc_id for phc_id, _, should_train, _, result in local_results
+            if should_train and not result.get('error')
+        ])
+        
+        for phc_id, patient_count, should_train, trigger_reason, result in local_results:
             self.stdout.write(f"\n{phc_id}:")
             self.stdout.write(f"  • Patients: {patient_count}")
             self.stdout.write(f"  • Should train: {should_train} ({trigger_reason})")
             
             if should_train:
-                self.stdout.write(self.style.WARNING(f"  → Training..."))
-                result = train_federated_model(phc_id, trigger_reason=trigger_reason)
+                self.stdout.write(self.style.WARNING(f"  → Trained"))
                 
                 if result.get('error'):
                     self.stdout.write(self.style.ERROR(f"    ✗ Error: {result['error']}"))
@@ -61,6 +119,7 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.SUCCESS(
                         f"    ✓ {result['version_string']} (Accuracy: {result['accuracy']:.4f})"
                     ))
+                    result['ml_insights'] = ml_insights_by_phc.get(phc_id, {})
                     trained_phcs.append({
                         'phc_id': phc_id,
                         'version_string': result['version_string'],
@@ -133,7 +192,7 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR("  ✗ Aggregation failed"))
         
         # SUMMARY
-        latest_global = get_latest_global_model()
+        latest_global = get_latest_global_model('version_string', 'accuracy', 'contributors')
         
         self.stdout.write("\n" + "="*70)
         self.stdout.write(self.style.SUCCESS("[SUMMARY]"))
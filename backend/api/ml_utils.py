@@ -1,47 +1,154 @@
 # Federated Learning ML Utilities
 import numpy as np
-import pandas as pd
 from xgboost import XGBClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import cross_val_score
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix, classification_report
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from api.models import LocalModel, GlobalModel, Patient, TrainingMetadata, ModelBroadcast
+from sklearn.base import clone
+from sklearn.preprocessing import LabelEncoder
+from django.conf import settings
+from api.models import LocalModel, GlobalModel, Patient, TrainingMetadata, ModelBroadcast, PHCLock
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
+from operator import attrgetter
+import bisect
 import logging
 import pickle
+import re
+import threading
+import time
+import zlib
 
 logger = logging.getLogger(__name__)
 
+# ============================================
+# MODEL SERIALIZATION
+# ============================================
+
+# Format byte prefixed to stored model blobs (legacy blobs are raw pickle, starting with 0x80)
+MODEL_FORMAT_PICKLE_ZLIB = b'\x01'
+MODEL_FORMAT_XGB_UBJ = b'\x02'
+
+
+def serialize_model(model):
+    """
+    Serialize a trained model to bytes for storage.
+    
+    XGBoost models are stored as the native UBJSON booster (no sklearn wrapper
+    pickle); label classes are stored separately in the weights dict.
+    """
+    if isinstance(model, XGBClassifier):
+        return MODEL_FORMAT_XGB_UBJ + bytes(model.get_booster().save_raw('ubj'))
+    return MODEL_FORMAT_PICKLE_ZLIB + zlib.compress(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL), 3)
+
+
+def deserialize_model(blob):
+    """Load a model stored by serialize_model (or a legacy raw pickle)"""
+    blob = bytes(blob)
+    if blob[:1] == MODEL_FORMAT_XGB_UBJ:
+        model = XGBClassifier()
+        model.load_model(bytearray(blob[1:]))
+        return model
+    if blob[:1] == MODEL_FORMAT_PICKLE_ZLIB:
+        return pickle.loads(zlib.decompress(blob[1:]))
+    return pickle.loads(blob)
+
 # ============================================
 # MODEL VERSIONING HELPERS
 # ============================================
 
-def get_latest_global_model():
+# The latest global model only changes on aggregation, so lookups are cached per
+# field set for GLOBAL_MODEL_CACHE_TTL seconds and invalidated by aggregate_models.
+GLOBAL_MODEL_CACHE_TTL = 60
+_global_model_cache = {}
+_global_model_cache_lock = threading.Lock()
+
+
+def invalidate_global_model_cache():
+    """Drop cached latest global model lookups"""
+    with _global_model_cache_lock:
+        _global_model_cache.clear()
+
+
+def get_latest_global_model(*fields):
     """
     Retrieve the latest global model.
     
+    Results are cached for GLOBAL_MODEL_CACHE_TTL seconds; treat the
+    returned document as read-only.
+    
+    Args:
+        *fields: Optional field names to load (all fields if omitted)
+    
     Returns:
         GlobalModel instance or None
     """
     try:
-        return GlobalModel.objects.order_by('-version').first()
+        entry = _global_model_cache.get(fields)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        
+        queryset = GlobalModel.objects.order_by('-version')
+        if fields:
+            queryset = queryset.only(*fields)
+        global_model = queryset.first()
+        
+        if global_model is not None:
+            with _global_model_cache_lock:
+                _global_model_cache[fields] = (global_model, time.time() + GLOBAL_MODEL_CACHE_TTL)
+        return global_model
     except Exception as e:
         logger.error(f"Error retrieving latest global model: {str(e)}")
         return None
 
 
-def get_latest_local_model(phc_id):
+# Latest local models only change when a PHC trains; cached per (phc_id, field set)
+# for LOCAL_MODEL_CACHE_TTL seconds and invalidated by train_federated_model.
+LOCAL_MODEL_CACHE_TTL = 30
+_local_model_cache = {}
+_local_model_cache_lock = threading.Lock()
+
+
+def invalidate_local_model_cache(phc_id):
+    """Drop cached latest local model lookups for a PHC"""
+    with _local_model_cache_lock:
+        for key in [key for key in _local_model_cache if key[0] == phc_id]:
+            del _local_model_cache[key]
+
+
+def get_latest_local_model(phc_id, *fields):
     """
     Retrieve the latest local model for a specific PHC.
     
+    Results are cached for LOCAL_MODEL_CACHE_TTL seconds; treat the
+    returned document as read-only.
+    
     Args:
         phc_id: PHC identifier
+        *fields: Optional field names to load (all fields if omitted)
     
     Returns:
         LocalModel instance or None
     """
     try:
-        return LocalModel.objects.filter(phc_id=phc_id).order_by('-version').first()
+        key = (phc_id, fields)
+        entry = _local_model_cache.get(key)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        
+        queryset = LocalModel.objects.filter(phc_id=phc_id).order_by('-version')
+        if fields:
+            queryset = queryset.only(*fields)
+        local_model = queryset.first()
+        
+        if local_model is not None:
+            with _local_model_cache_lock:
+                _local_model_cache[key] = (local_model, time.time() + LOCAL_MODEL_CACHE_TTL)
+        return local_model
     except Exception as e:
         logger.error(f"Error retrieving latest local model for {phc_id}: {str(e)}")
         return None
@@ -81,11 +188,124 @@ def generate_global_version_string(version_number):
     return f"global_v{version_number}"
 
 
+# ============================================
+# PER-PHC LOCKS
+# ============================================
+
+def acquire_phc_locks(name, phc_ids):
+    """
+    Claim the named lock for each PHC in one insert.
+    
+    Locks already held (by another worker or process) are skipped rather
+    than waited on; MongoDB's TTL index expires locks of crashed holders.
+    
+    Args:
+        name: Job name, e.g. 'analytics'
+        phc_ids: Iterable of PHC identifiers
+    
+    Returns:
+        List of phc_ids whose lock was acquired
+    """
+    phc_ids = list(phc_ids)
+    if not phc_ids:
+        return []
+    
+    now = datetime.utcnow()
+    try:
+        PHCLock._get_collection().insert_many(
+            [{'name': name, 'phc_id': phc_id, 'acquired_at': now} for phc_id in phc_ids],
+            ordered=False
+        )
+        return phc_ids
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        if any(err.get('code') != 11000 for err in write_errors):
+            raise
+        held = {phc_ids[err['index']] for err in write_errors}
+        return [phc_id for phc_id in phc_ids if phc_id not in held]
+
+
+def release_phc_locks(name, phc_ids):
+    """Release the named lock for the given PHCs"""
+    phc_ids = list(phc_ids)
+    if phc_ids:
+        PHCLock._get_collection().delete_many({'name': name, 'phc_id': {'$in': phc_ids}})
+
+
+# ============================================
+# ALERT BUFFERING
+# ============================================
+
+# When False, analytics alerts are written without the details breakdown
+ALERT_INCLUDE_DETAILS = getattr(settings, 'ALERT_INCLUDE_DETAILS', True)
+
+
+def flush_alert_buffer(alert_buffer):
+    """
+    Insert buffered (unsaved) Alert documents in one write and empty the buffer.
+    
+    Args:
+        alert_buffer: List of unsaved Alert instances
+    
+    Returns:
+        Number of alerts written
+    """
+    if not alert_buffer:
+        return 0
+    
+    try:
+        from api.models import Alert
+        
+        Alert.objects.insert(alert_buffer, load_bulk=False)
+        count = len(alert_buffer)
+        alert_buffer.clear()
+        return count
+    except Exception as e:
+        logger.error(f"Error writing {len(alert_buffer)} buffered alerts: {str(e)}")
+        return 0
+
+
+def _dispatch_alerts(alerts, alert_buffer):
+    """Append alerts to the caller's buffer, or write them immediately if there is none."""
+    if alert_buffer is not None:
+        alert_buffer.extend(alerts)
+    elif alerts:
+        from api.models import Alert
+        Alert.objects.insert(alerts, load_bulk=False)
+
+
 # ============================================
 # ML INNOVATION: DRIFT DETECTION
 # ============================================
 
-def detect_model_drift(phc_id):
+def _recent_local_models(phc_ids, limit=2):
+    """Return the newest `limit` local model summaries per PHC in one aggregation."""
+    # Rank models per PHC with a window function and keep the top `limit`
+    # before grouping, so the grouped arrays stay bounded regardless of
+    # training history ($setWindowFields, MongoDB 5.0+)
+    rows = LocalModel.objects.aggregate([
+        {'$match': {'phc_id': {'$in': list(phc_ids)}}},
+        {'$project': {'phc_id': 1, 'version': 1, 'version_string': 1, 'accuracy': 1}},
+        {'$setWindowFields': {
+            'partitionBy': '$phc_id',
+            'sortBy': {'version': -1},
+            'output': {'rank': {'$documentNumber': {}}}
+        }},
+        {'$match': {'rank': {'$lte': limit}}},
+        {'$sort': {'phc_id': 1, 'version': -1}},
+        {'$group': {
+            '_id': '$phc_id',
+            'models': {'$push': {
+                'version': '$version',
+                'version_string': '$version_string',
+                'accuracy': '$accuracy'
+            }}
+        }}
+    ])
+    return {row['_id']: row['models'] for row in rows}
+
+
+def detect_model_drift(phc_id, alert_buffer=None):
     """
     Detect model drift by comparing current local model accuracy
     with previous local model accuracy.
@@ -94,76 +314,110 @@ def detect_model_drift(phc_id):
     
     Args:
         phc_id: PHC identifier
+        alert_buffer: Optional list; alerts are appended to it instead of written
     
     Returns:
         Dictionary with drift_detected (bool) and details
     """
+    return detect_model_drift_bulk([phc_id], alert_buffer=alert_buffer)[phc_id]
+
+
+def detect_model_drift_bulk(phc_ids, alert_buffer=None):
+    """
+    Detect model drift for several PHCs in one pass.
+    
+    The latest two local models of every PHC are loaded with a single
+    grouped query and all drift alerts are written in one insert.
+    
+    Args:
+        phc_ids: Iterable of PHC identifiers
+        alert_buffer: Optional list; alerts are appended to it instead of written
+    
+    Returns:
+        Dictionary mapping each phc_id to its drift result
+    """
+    phc_ids = list(phc_ids)
+    
     try:
         from api.models import Alert
         
-        # Get latest and second-latest models
-        latest = LocalModel.objects.filter(phc_id=phc_id).order_by('-version').first()
-        previous = LocalModel.objects.filter(phc_id=phc_id).order_by('-version').skip(1).first()
+        recent_models = _recent_local_models(phc_ids, limit=2)
+        results = {}
+        drifted = []
         
-        if not latest or not previous:
-            return {
-                'drift_detected': False,
-                'reason': 'insufficient_history',
-                'phc_id': phc_id
-            }
-        
-        accuracy_drop = previous.accuracy - latest.accuracy
-        accuracy_drop_percentage = (accuracy_drop / previous.accuracy * 100) if previous.accuracy > 0 else 0
-        
-        drift_detected = accuracy_drop_percentage > 10.0
-        
-        # Create alert if drift detected
-        if drift_detected:
-            latest_global = get_latest_global_model()
+        for phc_id in phc_ids:
+            latest, previous = (recent_models.get(phc_id, []) + [None, None])[:2]
             
-            alert = Alert.objects.create(
-                phc_id=phc_id,
-                alert_type='MODEL_DRIFT',
-                risk_score=accuracy_drop_percentage,
-                severity='HIGH' if accuracy_drop_percentage > 20 else 'MEDIUM',
-                local_model_version=latest.version,
-                local_model_version_string=latest.version_string,
-                global_model_version=latest_global.version if latest_global else 0,
-                global_model_version_string=latest_global.version_string if latest_global else None,
-                drift_detected=True,
-                accuracy_drop_percentage=accuracy_drop_percentage,
-                previous_accuracy=previous.accuracy,
-                current_accuracy=latest.accuracy,
-                message=f"Model drift detected in {phc_id}: accuracy dropped {accuracy_drop_percentage:.2f}%",
-                details={
-                    'previous_version': previous.version_string,
-                    'current_version': latest.version_string,
-                    'previous_accuracy': round(previous.accuracy, 4),
-                    'current_accuracy': round(latest.accuracy, 4),
-                    'drop_percentage': round(accuracy_drop_percentage, 2)
+            if not latest or not previous:
+                results[phc_id] = {
+                    'drift_detected': False,
+                    'reason': 'insufficient_history',
+                    'phc_id': phc_id
                 }
-            )
+                continue
             
-            logger.warning(
-                f"Drift detected for {phc_id}: accuracy dropped from {previous.accuracy:.4f} to {latest.accuracy:.4f} ({accuracy_drop_percentage:.2f}%)"
-            )
+            accuracy_drop = previous['accuracy'] - latest['accuracy']
+            accuracy_drop_percentage = (accuracy_drop / previous['accuracy'] * 100) if previous['accuracy'] > 0 else 0
+            
+            drift_detected = accuracy_drop_percentage > 10.0
+            
+            if drift_detected:
+                drifted.append((phc_id, latest, previous, accuracy_drop_percentage))
+                logger.warning(
+                    f"Drift detected for {phc_id}: accuracy dropped from {previous['accuracy']:.4f} to {latest['accuracy']:.4f} ({accuracy_drop_percentage:.2f}%)"
+                )
+            
+            results[phc_id] = {
+                'drift_detected': drift_detected,
+                'phc_id': phc_id,
+                'accuracy_drop_percentage': round(accuracy_drop_percentage, 2),
+                'previous_accuracy': previous['accuracy'],
+                'current_accuracy': latest['accuracy'],
+                'threshold': 10.0,
+                'alert_created': drift_detected
+            }
         
-        return {
-            'drift_detected': drift_detected,
-            'phc_id': phc_id,
-            'accuracy_drop_percentage': round(accuracy_drop_percentage, 2),
-            'previous_accuracy': previous.accuracy,
-            'current_accuracy': latest.accuracy,
-            'threshold': 10.0,
-            'alert_created': drift_detected
-        }
+        # Create alerts for every drifted PHC in a single insert
+        if drifted:
+            latest_global = get_latest_global_model('version', 'version_string')
+            
+            _dispatch_alerts([
+                Alert(
+                    phc_id=phc_id,
+                    alert_type='MODEL_DRIFT',
+                    risk_score=accuracy_drop_percentage,
+                    severity='HIGH' if accuracy_drop_percentage > 20 else 'MEDIUM',
+                    local_model_version=latest['version'],
+                    local_model_version_string=latest['version_string'],
+                    global_model_version=latest_global.version if latest_global else 0,
+                    global_model_version_string=latest_global.version_string if latest_global else None,
+                    drift_detected=True,
+                    accuracy_drop_percentage=accuracy_drop_percentage,
+                    previous_accuracy=previous['accuracy'],
+                    current_accuracy=latest['accuracy'],
+                    message=f"Model drift detected in {phc_id}: accuracy dropped {accuracy_drop_percentage:.2f}%",
+                    details={
+                        'previous_version': previous['version_string'],
+                        'current_version': latest['version_string'],
+                        'previous_accuracy': round(previous['accuracy'], 4),
+                        'current_accuracy': round(latest['accuracy'], 4),
+                        'drop_percentage': results[phc_id]['accuracy_drop_percentage']
+                    } if ALERT_INCLUDE_DETAILS else {}
+                )
+                for phc_id, latest, previous, accuracy_drop_percentage in drifted
+            ], alert_buffer)
+        
+        return results
     
     except Exception as e:
-        logger.error(f"Error detecting drift for {phc_id}: {str(e)}")
+        logger.error(f"Error detecting drift for {', '.join(phc_ids)}: {str(e)}")
         return {
-            'drift_detected': False,
-            'error': str(e),
-            'phc_id': phc_id
+            phc_id: {
+                'drift_detected': False,
+                'error': str(e),
+                'phc_id': phc_id
+            }
+            for phc_id in phc_ids
         }
 
 
@@ -171,7 +425,56 @@ def detect_model_drift(phc_id):
 # ML INNOVATION: COMPOSITE OUTBREAK RISK SCORE
 # ============================================
 
-def calculate_composite_risk_score(phc_id):
+# Diagnoses matching "disease" keywords (fever-related), matched case-insensitively server-side
+DISEASE_KEYWORDS = ('fever', 'malaria', 'typhoid', 'dengue', 'influenza')
+DISEASE_REGEX = '|'.join(DISEASE_KEYWORDS)
+DISEASE_PATTERN = re.compile(DISEASE_REGEX, re.IGNORECASE)
+
+# Composite score severity bands: [0, 30) LOW, [30, 60) MEDIUM, [60, 100] HIGH
+COMPOSITE_SEVERITY_THRESHOLDS = (30, 60)
+COMPOSITE_SEVERITY_LABELS = ('LOW', 'MEDIUM', 'HIGH')
+
+
+def _composite_risk_counts(phc_ids, modeled_phc_ids=()):
+    """
+    Return fever, keyword-matched diagnosis and abnormal WBC counts per PHC in one aggregation.
+    
+    Diagnoses are only matched for PHCs in modeled_phc_ids; the others
+    never use positive_predictions, so their count is not computed.
+    """
+    group = {
+        '_id': '$phc_id',
+        'total': {'$sum': 1},
+        'fever_cases': {'$sum': {'$cond': [{'$eq': ['$fever', 1]}, 1, 0]}},
+        # Normal WBC: 4,500-11,000 cells/μL, flag if outside this range
+        'abnormal_wbc': {'$sum': {'$cond': [
+            {'$or': [{'$lt': ['$wbc_count', 4500]}, {'$gt': ['$wbc_count', 11000]}]}, 1, 0
+        ]}}
+    }
+    if modeled_phc_ids:
+        # disease_label is a small categorical set: match the keywords once per
+        # distinct label (index-only distinct scan) and count by set membership
+        positive_labels = [
+            label for label in Patient.objects(phc_id__in=list(modeled_phc_ids)).distinct('disease_label')
+            if label and DISEASE_PATTERN.search(label)
+        ]
+        if positive_labels:
+            # $and short-circuits, so PHCs without a model skip the label check
+            group['positive_predictions'] = {'$sum': {'$cond': [
+                {'$and': [
+                    {'$in': ['$phc_id', list(modeled_phc_ids)]},
+                    {'$in': ['$disease_label', positive_labels]}
+                ]}, 1, 0
+            ]}}
+    
+    rows = Patient.objects.aggregate([
+        {'$match': {'phc_id': {'$in': list(phc_ids)}}},
+        {'$group': group}
+    ])
+    return {row['_id']: row for row in rows}
+
+
+def calculate_composite_risk_score(phc_id, alert_buffer=None):
     """
     Calculate composite outbreak risk score for a PHC.
     
@@ -189,134 +492,228 @@ def calculate_composite_risk_score(phc_id):
     
     Args:
         phc_id: PHC identifier
+        alert_buffer: Optional list; alerts are appended to it instead of written
     
     Returns:
         Dictionary with risk score and severity
     """
+    return calculate_composite_risk_score_bulk([phc_id], alert_buffer=alert_buffer)[phc_id]
+
+
+def calculate_composite_risk_score_bulk(phc_ids, alert_buffer=None):
+    """
+    Calculate composite outbreak risk scores for several PHCs in one pass.
+    
+    Patient counts and latest local models are loaded with one grouped
+    query each, and all COMPOSITE_RISK alerts are written in one insert.
+    
+    Args:
+        phc_ids: Iterable of PHC identifiers
+        alert_buffer: Optional list; alerts are appended to it instead of written
+    
+    Returns:
+        Dictionary mapping each phc_id to its risk score result
+    """
+    phc_ids = list(phc_ids)
+    
     try:
         from api.models import Alert
         
-        # Get all patients for this PHC
-        patients = list(Patient.objects.filter(phc_id=phc_id))
-        
-        if not patients:
-            return {
-                'risk_score': 0.0,
-                'severity': 'LOW',
-                'reason': 'no_patients',
-                'phc_id': phc_id
-            }
-        
-        # Calculate metrics
-        total_patients = len(patients)
-        
-        # 1) Fever percentage (weight: 0.4)
-        fever_cases = sum(1 for p in patients if p.fever == 1)
-        fever_percentage = (fever_cases / total_patients) * 100
-        fever_component = (fever_percentage / 100) * 0.4 * 100
-        
-        # 2) Positive predictions percentage (weight: 0.3)
-        # Use latest local model to predict diagnosis match
-        latest_model = get_latest_local_model(phc_id)
-        positive_predictions = 0
-        
-        if latest_model:
-            # Count patients matching "disease" diagnoses (fever-related)
-            disease_keywords = ['fever', 'malaria', 'typhoid', 'dengue', 'influenza']
-            positive_predictions = sum(
-                1 for p in patients 
-                if any(keyword.lower() in p.disease_label.lower() for keyword in disease_keywords)
-            )
-        
-        positive_predictions_percentage = (positive_predictions / total_patients) * 100
-        predictions_component = (positive_predictions_percentage / 100) * 0.3 * 100
+        # Resolve latest models first so diagnosis matching is limited to PHCs that have one
+        latest_models = _recent_local_models(phc_ids, limit=1)
+        all_counts = _composite_risk_counts(phc_ids, modeled_phc_ids=list(latest_models))
+        results = {}
+        alerts = []
+        
+        for phc_id in phc_ids:
+            if phc_id not in all_counts:
+                results[phc_id] = {
+                    'risk_score': 0.0,
+                    'severity': 'LOW',
+                    'reason': 'no_patients',
+                    'phc_id': phc_id
+                }
         
-        # 3) Abnormal WBC ratio (weight: 0.3)
-        # Normal WBC: 4,500-11,000 cells/μL, flag if outside this or too high
-        abnormal_wbc = sum(
-            1 for p in patients 
-            if p.wbc_count < 4500 or p.wbc_count > 11000
-        )
-        abnormal_wbc_ratio = (abnormal_wbc / total_patients) * 100
-        wbc_component = (abnormal_wbc_ratio / 100) * 0.3 * 100
-        
-        # Composite score (0-100 scale)
-        composite_score = fever_component + predictions_component + wbc_component
-        composite_score = max(0, min(100, composite_score))  # Clamp to 0-100
-        
-        # Determine severity
-        if composite_score < 30:
-            severity = 'LOW'
-        elif composite_score < 60:
-            severity = 'MEDIUM'
-        else:
-            severity = 'HIGH'
+        scored_phc_ids = [phc_id for phc_id in phc_ids if phc_id in all_counts]
+        if not scored_phc_ids:
+            return results
         
-        # Create alert
-        latest_global = get_latest_global_model()
+        latest_global = get_latest_global_model('version', 'version_string')
         
-        alert = Alert.objects.create(
-            phc_id=phc_id,
-            alert_type='COMPOSITE_RISK',
-            risk_score=composite_score,
-            severity=severity,
-            local_model_version=latest_model.version if latest_model else 0,
-            local_model_version_string=latest_model.version_string if latest_model else None,
-            global_model_version=latest_global.version if latest_global else 0,
-            global_model_version_string=latest_global.version_string if latest_global else None,
-            fever_percentage=fever_percentage,
-            positive_predictions_percentage=positive_predictions_percentage,
-            abnormal_wbc_ratio=abnormal_wbc_ratio,
-            composite_score_breakdown={
-                'fever_component': round(fever_component, 2),
-                'predictions_component': round(predictions_component, 2),
-                'wbc_component': round(wbc_component, 2)
-            },
-            message=f"Composite risk score for {phc_id}: {composite_score:.2f}/100 ({severity})",
-            details={
+        for phc_id in scored_phc_ids:
+            # Calculate metrics
+            counts = all_counts[phc_id]
+            total_patients = counts['total']
+            
+            # 1) Fever percentage (weight: 0.4)
+            fever_cases = counts['fever_cases']
+            fever_percentage = (fever_cases / total_patients) * 100
+            fever_component = (fever_percentage / 100) * 0.4 * 100
+            
+            # 2) Positive predictions percentage (weight: 0.3)
+            # Use latest local model to predict diagnosis match
+            latest_model = (latest_models.get(phc_id) or [None])[0]
+            positive_predictions = counts.get('positive_predictions', 0) if latest_model else 0
+            
+            positive_predictions_percentage = (positive_predictions / total_patients) * 100
+            predictions_component = (positive_predictions_percentage / 100) * 0.3 * 100
+            
+            # 3) Abnormal WBC ratio (weight: 0.3)
+            abnormal_wbc = counts['abnormal_wbc']
+            abnormal_wbc_ratio = (abnormal_wbc / total_patients) * 100
+            wbc_component = (abnormal_wbc_ratio / 100) * 0.3 * 100
+            
+            # Composite score (0-100 scale)
+            composite_score = fever_component + predictions_component + wbc_component
+            composite_score = max(0, min(100, composite_score))  # Clamp to 0-100
+            
+            # Determine severity
+            severity = COMPOSITE_SEVERITY_LABELS[bisect.bisect_right(COMPOSITE_SEVERITY_THRESHOLDS, composite_score)]
+            
+            # Round and format each reported value once
+            components = {
+                'fever': round(fever_component, 2),
+                'predictions': round(predictions_component, 2),
+                'wbc': round(wbc_component, 2)
+            }
+            score_summary = f"{composite_score:.2f}/100 ({severity})"
+            
+            alerts.append(Alert(
+                phc_id=phc_id,
+                alert_type='COMPOSITE_RISK',
+                risk_score=composite_score,
+                severity=severity,
+                local_model_version=latest_model['version'] if latest_model else 0,
+                local_model_version_string=latest_model['version_string'] if latest_model else None,
+                global_model_version=latest_global.version if latest_global else 0,
+                global_model_version_string=latest_global.version_string if latest_global else None,
+                fever_percentage=fever_percentage,
+                positive_predictions_percentage=positive_predictions_percentage,
+                abnormal_wbc_ratio=abnormal_wbc_ratio,
+                composite_score_breakdown={
+                    'fever_component': components['fever'],
+                    'predictions_component': components['predictions'],
+                    'wbc_component': components['wbc']
+                },
+                message=f"Composite risk score for {phc_id}: {score_summary}",
+                details={
+                    'total_patients': total_patients,
+                    'fever_cases': fever_cases,
+                    'positive_predictions': positive_predictions,
+                    'abnormal_wbc_count': abnormal_wbc,
+                    'calculation': {
+                        'fever': f"{fever_percentage:.2f}% × 0.4 = {fever_component:.2f}",
+                        'predictions': f"{positive_predictions_percentage:.2f}% × 0.3 = {predictions_component:.2f}",
+                        'wbc': f"{abnormal_wbc_ratio:.2f}% × 0.3 = {wbc_component:.2f}"
+                    }
+                } if ALERT_INCLUDE_DETAILS else {}
+            ))
+            
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"Composite risk score for {phc_id}: {score_summary} - "
+                    f"Fever: {fever_percentage:.2f}%, Predictions: {positive_predictions_percentage:.2f}%, "
+                    f"Abnormal WBC: {abnormal_wbc_ratio:.2f}%"
+                )
+            
+            results[phc_id] = {
+                'phc_id': phc_id,
+                'risk_score': round(composite_score, 2),
+                'severity': severity,
+                'fever_percentage': round(fever_percentage, 2),
+                'positive_predictions_percentage': round(positive_predictions_percentage, 2),
+                'abnormal_wbc_ratio': round(abnormal_wbc_ratio, 2),
+                'components': components,
                 'total_patients': total_patients,
-                'fever_cases': fever_cases,
-                'positive_predictions': positive_predictions,
-                'abnormal_wbc_count': abnormal_wbc,
-                'calculation': {
-                    'fever': f"{fever_percentage:.2f}% × 0.4 = {fever_component:.2f}",
-                    'predictions': f"{positive_predictions_percentage:.2f}% × 0.3 = {predictions_component:.2f}",
-                    'wbc': f"{abnormal_wbc_ratio:.2f}% × 0.3 = {wbc_component:.2f}"
-                }
+                'alert_created': True
             }
-        )
         
-        logger.info(
-            f"Composite risk score for {phc_id}: {composite_score:.2f}/100 ({severity}) - "
-            f"Fever: {fever_percentage:.2f}%, Predictions: {positive_predictions_percentage:.2f}%, "
-            f"Abnormal WBC: {abnormal_wbc_ratio:.2f}%"
-        )
+        # Create alerts for every scored PHC in a single insert
+        _dispatch_alerts(alerts, alert_buffer)
         
-        return {
-            'phc_id': phc_id,
-            'risk_score': round(composite_score, 2),
-            'severity': severity,
-            'fever_percentage': round(fever_percentage, 2),
-            'positive_predictions_percentage': round(positive_predictions_percentage, 2),
-            'abnormal_wbc_ratio': round(abnormal_wbc_ratio, 2),
-            'components': {
-                'fever': round(fever_component, 2),
-                'predictions': round(predictions_component, 2),
-                'wbc': round(wbc_component, 2)
-            },
-            'total_patients': total_patients,
-            'alert_created': True
-        }
+        return results
     
     except Exception as e:
-        logger.error(f"Error calculating composite risk score for {phc_id}: {str(e)}")
+        logger.error(f"Error calculating composite risk score for {', '.join(phc_ids)}: {str(e)}")
         return {
-            'risk_score': 0.0,
-            'severity': 'LOW',
-            'error': str(e),
-            'phc_id': phc_id
+            phc_id: {
+                'risk_score': 0.0,
+                'severity': 'LOW',
+                'error': str(e),
+                'phc_id': phc_id
+            }
+            for phc_id in phc_ids
         }
 
+# ============================================
+# POST-TRAINING ANALYTICS FAN-OUT
+# ============================================
+
+ANALYTICS_SHARD_SIZE = 100  # PHCs per bulk drift/risk call
+ANALYTICS_MAX_WORKERS = 8
+
+
+def _run_analytics_shard(shard):
+    """Run both bulk analytics for one shard of PHCs, buffering its alerts."""
+    alerts = []
+    drift_results = detect_model_drift_bulk(shard, alert_buffer=alerts)
+    risk_results = calculate_composite_risk_score_bulk(shard, alert_buffer=alerts)
+    return drift_results, risk_results, alerts
+
+
+def run_post_training_analytics(phc_ids, shard_size=ANALYTICS_SHARD_SIZE):
+    """
+    Run drift detection and composite risk scoring for many PHCs.
+    
+    PHCs are split into shards of `shard_size`. Each shard issues one grouped
+    query per analytic, and shards run concurrently in a thread pool (the work
+    is MongoDB-bound). Alerts from all shards are written in one insert.
+    
+    PHCs whose analytics lock is held by a concurrent run are skipped, so
+    overlapping runs never compute or alert twice for the same PHC.
+    
+    Args:
+        phc_ids: Iterable of PHC identifiers
+        shard_size: Number of PHCs handled per bulk call
+    
+    Returns:
+        Dictionary mapping phc_id to {'drift_detection', 'composite_risk_score'}
+        (PHCs skipped because of a held lock are omitted)
+    """
+    phc_ids = list(phc_ids)
+    locked_phc_ids = acquire_phc_locks('analytics', phc_ids)
+    if len(locked_phc_ids) < len(phc_ids):
+        skipped = sorted(set(phc_ids) - set(locked_phc_ids))
+        logger.info(f"Analytics already running for {', '.join(skipped)}; skipping")
+    
+    try:
+        shards = [locked_phc_ids[i:i + shard_size] for i in range(0, len(locked_phc_ids), shard_size)]
+        if not shards:
+            return {}
+        
+        if len(shards) == 1:
+            shard_results = [_run_analytics_shard(shards[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(shards), ANALYTICS_MAX_WORKERS)) as executor:
+                shard_results = list(executor.map(_run_analytics_shard, shards))
+        
+        insights = {}
+        alert_buffer = []
+        for drift_results, risk_results, alerts in shard_results:
+            alert_buffer.extend(alerts)
+            for phc_id, drift_result in drift_results.items():
+                insights[phc_id] = {
+                    'drift_detection': drift_result,
+                    'composite_risk_score': risk_results[phc_id]
+                }
+        
+        flush_alert_buffer(alert_buffer)
+        
+        return insights
+    finally:
+        release_phc_locks('analytics', locked_phc_ids)
+
+
 # ============================================
 # AUTOMATIC TRAINING CYCLE MANAGEMENT
 # ============================================
@@ -333,7 +730,12 @@ def should_trigger_local_training(phc_id):
         Tuple of (should_train: bool, reason: str)
     """
     try:
-        metadata = TrainingMetadata.objects.filter(phc_id=phc_id).first()
+        # Only the two trigger fields are read, so project the rest away
+        metadata = (
+            TrainingMetadata.objects.filter(phc_id=phc_id)
+            .only('patients_since_last_training', 'last_training_at')
+            .first()
+        )
         
         if not metadata:
             # First training
@@ -365,20 +767,17 @@ def should_trigger_global_aggregation():
         Tuple of (should_aggregate: bool, reason: str, pending_phcs: list)
     """
     try:
-        # Find unaggregated local models
-        unaggregated = LocalModel.objects.filter(aggregated=False)
+        # Unique PHCs with unaggregated local models, resolved server-side
+        phc_ids = LocalModel.objects(aggregated=False).distinct('phc_id')
         
-        if not unaggregated:
+        if not phc_ids:
             return (False, 'no_models', [])
         
-        # Group by phc_id to find unique PHCs with unaggregated models
-        phc_ids = set(m.phc_id for m in unaggregated)
-        
         # Need at least 3 PHCs with new models
         if len(phc_ids) >= 3:
-            return (True, 'threshold_met', list(phc_ids))
+            return (True, 'threshold_met', phc_ids)
         
-        return (False, 'insufficient_phcs', list(phc_ids))
+        return (False, 'insufficient_phcs', phc_ids)
     
     except Exception as e:
         logger.error(f"Error checking aggregation trigger: {str(e)}")
@@ -386,34 +785,36 @@ def should_trigger_global_aggregation():
 
 
 def record_training_completion(phc_id, success=True):
-    """Record that training completed for a PHC and release training lock"""
+    """
+    Record that training completed for a PHC (timestamps and counters only).
+    
+    The 'training' PHCLock is released only by its holder, handle_patient_creation;
+    runs that never took the lock (training cycle, manual) must not delete it.
+    """
     try:
-        metadata = TrainingMetadata.objects.filter(phc_id=phc_id).first()
-        if metadata:
-            if success:
-                metadata.last_training_at = datetime.utcnow()
-                metadata.patients_since_last_training = 0
-            # HACKATHON FIX: Always release lock, even if training fails
-            metadata.training_in_progress = False
-            metadata.updated_at = datetime.utcnow()
-            metadata.save()
+        if success:
+            # Single atomic update instead of read-modify-save
+            now = datetime.utcnow()
+            TrainingMetadata.objects(phc_id=phc_id).update_one(
+                set__last_training_at=now,
+                set__patients_since_last_training=0,
+                set__updated_at=now
+            )
     except Exception as e:
         logger.error(f"Error recording training completion for {phc_id}: {str(e)}")
 
 
-def increment_patient_count(phc_id):
-    """Increment patient count since last training"""
+def increment_patient_count(phc_id, count=1):
+    """Increment patient count since last training by count new patients"""
     try:
-        metadata = TrainingMetadata.objects.filter(phc_id=phc_id).first()
-        if metadata:
-            metadata.patients_since_last_training += 1
-            metadata.updated_at = datetime.utcnow()
-            metadata.save()
-        else:
-            TrainingMetadata.objects.create(
-                phc_id=phc_id,
-                patients_since_last_training=1
-            )
+        # Atomic $inc (creating the metadata on first patient) so concurrent
+        # submissions never lose counts
+        TrainingMetadata.objects(phc_id=phc_id).update_one(
+            inc__patients_since_last_training=count,
+            set__updated_at=datetime.utcnow(),
+            set_on_insert__last_aggregated_version=0,
+            upsert=True
+        )
     except Exception as e:
         logger.error(f"Error incrementing patient count for {phc_id}: {str(e)}")
 
@@ -428,13 +829,17 @@ def broadcast_global_model(global_model_version, version_string=None):
         version_string: String version (e.g., "global_v3")
     """
     try:
-        # Record that all PHCs have received the new global model
-        for phc_num in range(1, 5):
-            phc_id = f'PHC_{phc_num}'
-            ModelBroadcast.objects.create(
-                phc_id=phc_id,
-                global_model_version=global_model_version
+        # Record that all PHCs have received the new global model (one bulk_write);
+        # upserts keep a repeated broadcast of the same version to one record per PHC
+        now = datetime.utcnow()
+        ModelBroadcast._get_collection().bulk_write([
+            UpdateOne(
+                {'phc_id': f'PHC_{phc_num}', 'global_model_version': global_model_version},
+                {'$set': {'received_at': now}},
+                upsert=True
             )
+            for phc_num in range(1, 5)
+        ], ordered=False)
         
         version_info = version_string if version_string else f"v{global_model_version}"
         logger.info(f"Global model {version_info} broadcasted to all PHCs")
@@ -445,35 +850,110 @@ def broadcast_global_model(global_model_version, version_string=None):
 
 
 
+# Fixed model input schema, in training/inference column order
+FEATURE_COLUMNS = (
+    'fever',
+    'cough',
+    'fatigue',
+    'headache',
+    'vomiting',
+    'breathlessness',
+    'temperature_c',
+    'heart_rate',
+    'bp_systolic',
+    'wbc_count',
+    'platelet_count',
+    'hemoglobin',
+)
+
+
+@lru_cache(maxsize=8)
+def _feature_extractor(feature_columns):
+    """
+    Compile a row extractor specialised for a fixed column order.
+    
+    The generated function is `lambda p: (p.get('fever') or 0, ...)` with the
+    column names inlined, so the per-cell loop and name lookups disappear.
+    NaN values pass through unchanged and are zeroed by the caller.
+    """
+    body = ', '.join(f'get({col!r}) or 0' for col in feature_columns)
+    src = f"def _extract(p):\n    get = p.get\n    return ({body},)\n"
+    namespace = {}
+    exec(src, namespace)
+    return namespace['_extract']
+
+
 def preprocess_data(patients, feature_columns):
     """
     Extract features and labels from patient data.
     
     Args:
-        patients: List of Patient objects
-        feature_columns: List of feature column names
+        patients: List of raw patient documents (dicts, e.g. from as_pymongo())
+        feature_columns: Sequence of feature column names (usually FEATURE_COLUMNS)
     
     Returns:
-        X (numpy array), y (numpy array), feature_columns (list)
+        X (float32 numpy array), y_encoded (small int numpy array),
+        label_encoder (fitted LabelEncoder, None if no patients), feature_columns
     """
     if not patients:
-        return np.array([]), np.array([]), feature_columns
+        return np.array([]), np.array([]), None, feature_columns
     
-    X_list = []
-    for p in patients:
-        row = []
-        for col in feature_columns:
-            val = getattr(p, col, None)
-            row.append(float(val) if val is not None else 0.0)
-        X_list.append(row)
+    # Missing values (None) become 0 in the extractor; stored NaNs are zeroed here
+    extract = _feature_extractor(tuple(feature_columns))
+    X = np.fromiter(
+        chain.from_iterable(map(extract, patients)),
+        dtype=np.float32,
+        count=len(patients) * len(feature_columns)
+    ).reshape(len(patients), len(feature_columns))
+    np.nan_to_num(X, copy=False, nan=0.0)
     
-    X = np.array(X_list)
-    y = np.array([p.disease_label for p in patients])
+    # Encode labels once here; downstream works on the integer codes
+    label_encoder = LabelEncoder()
+    y_encoded = label_encoder.fit_transform([p.get('disease_label') for p in patients])
+    y_encoded = y_encoded.astype(np.int8 if len(label_encoder.classes_) <= 127 else np.int32)
     
-    return X, y, feature_columns
+    return X, y_encoded, label_encoder, feature_columns
+
 
+# XGBoost threads per fit; -1 uses every core. Pooled training workers lower
+# this so concurrent fits do not oversubscribe the CPU
+TRAINING_N_JOBS = -1
 
-def train_local_model(X, y, feature_columns):
+# Early stopping: stop adding trees once validation mlogloss stalls for this many rounds
+EARLY_STOPPING_ROUNDS = 20
+EARLY_STOPPING_VALIDATION_FRACTION = 0.15
+EARLY_STOPPING_MIN_SAMPLES = 100
+
+# 5-fold cross-validation costs five extra fits and is only used for logging/storage
+TRAINING_CROSS_VALIDATION = getattr(settings, 'TRAINING_CROSS_VALIDATION', False)
+
+
+def _split_indices(y_encoded, test_size, stratify=True, seed=42):
+    """
+    Seeded shuffle split into (train_idx, test_idx) index arrays.
+    
+    When stratifying, each class is shuffled and split separately so both
+    sides keep the class proportions; every class keeps at least one train
+    sample, and classes with 2+ samples get at least one test sample. The
+    combined train indices are shuffled again, so slices of the train split
+    (e.g. the early-stopping validation tail) are not ordered by class.
+    """
+    rng = np.random.default_rng(seed)
+    if not stratify:
+        perm = rng.permutation(len(y_encoded))
+        n_test = int(np.ceil(test_size * len(y_encoded)))
+        return perm[n_test:], perm[:n_test]
+    
+    train_parts, test_parts = [], []
+    for cls in np.unique(y_encoded):
+        idx = rng.permutation(np.flatnonzero(y_encoded == cls))
+        n_test = min(max(1, int(round(test_size * len(idx)))), len(idx) - 1)
+        test_parts.append(idx[:n_test])
+        train_parts.append(idx[n_test:])
+    return rng.permutation(np.concatenate(train_parts)), rng.permutation(np.concatenate(test_parts))
+
+
+def train_local_model(X, y_encoded, label_encoder, feature_columns):
     """
     Train XGBoost model on local PHC data.
     
@@ -482,15 +962,18 @@ def train_local_model(X, y, feature_columns):
     ✓ Checks for multiple diagnostic classes
     ✓ Uses train/test split (70/30)
     ✓ Stratified split to preserve class distribution
-    ✓ Encodes labels with LabelEncoder
+    ✓ Labels arrive encoded by preprocess_data's LabelEncoder
     ✓ Trains XGBoost classifier with optimized hyperparameters
-    ✓ 5-fold cross-validation for robustness
+    ✓ Early stopping on a validation slice of the train split
+    ✓ 5-fold cross-validation for robustness (opt-in, TRAINING_CROSS_VALIDATION)
     ✓ Evaluation ONLY on test set (not training set which can be inflated)
     ✓ Ensures diagnosis is NOT in feature matrix
     
     Args:
-        X: Feature matrix (numpy array) - symptom and vital features
-        y: Labels (numpy array) - disease_label (target variable)
+        X: Feature matrix (float32 numpy array) - symptom and vital features,
+            standardized in place
+        y_encoded: Encoded labels (int numpy array) - disease_label (target variable)
+        label_encoder: LabelEncoder fitted by preprocess_data
         feature_columns: List of feature names
     
     Returns:
@@ -506,9 +989,9 @@ def train_local_model(X, y, feature_columns):
         }
     
     # Check if X and y have same length
-    if len(X) != len(y):
+    if len(X) != len(y_encoded):
         return {
-            'error': f'Feature matrix and labels length mismatch: X={len(X)}, y={len(y)}',
+            'error': f'Feature matrix and labels length mismatch: X={len(X)}, y={len(y_encoded)}',
             'num_samples': len(X)
         }
     
@@ -527,8 +1010,9 @@ def train_local_model(X, y, feature_columns):
         }
     
     # Check if only one class
-    unique_classes = len(np.unique(y))
-    class_counts = np.unique(y, return_counts=True)[1]
+    class_counts = np.bincount(y_encoded)
+    class_counts = class_counts[class_counts > 0]
+    unique_classes = len(class_counts)
     if unique_classes < 2:
         return {
             'error': 'Only one diagnosis class present. Need at least 2 classes for classification.',
@@ -545,12 +1029,14 @@ def train_local_model(X, y, feature_columns):
         # ============================================
         # PREPROCESSING: Normalize Features + Encode Labels
         # ============================================
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        
-        # Encode labels to numeric (0, 1, 2, ..., n_classes-1)
-        label_encoder = LabelEncoder()
-        y_encoded = label_encoder.fit_transform(y)
+        # Standardize in place on the float32 matrix; StandardScaler would
+        # allocate a float64 copy. mean/std are kept to reproduce it at inference
+        X_scaled = np.asarray(X, dtype=np.float32)
+        feature_mean = X_scaled.mean(axis=0)
+        feature_std = X_scaled.std(axis=0)
+        feature_std[feature_std == 0] = 1.0
+        X_scaled -= feature_mean
+        X_scaled /= feature_std
         
         logger.info(f'Feature scaling complete. X shape: {X_scaled.shape}, Classes: {unique_classes}')
         logger.info(f'Label encoding: {list(zip(label_encoder.classes_, range(len(label_encoder.classes_))))}')
@@ -563,20 +1049,13 @@ def train_local_model(X, y, feature_columns):
         
         test_size = 0.3  # 30% test, 70% train
         
+        train_idx, test_idx = _split_indices(y_encoded, test_size, stratify=can_stratify)
+        X_train, X_test = X_scaled[train_idx], X_scaled[test_idx]
+        y_train, y_test = y_encoded[train_idx], y_encoded[test_idx]
+        
         if can_stratify:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_scaled, y_encoded,
-                test_size=test_size,
-                random_state=42,
-                stratify=y_encoded  # STRATIFIED
-            )
             logger.info(f'Stratified split: train={len(X_train)}, test={len(X_test)}')
         else:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_scaled, y_encoded,
-                test_size=test_size,
-                random_state=42
-            )
             logger.warning(f'Non-stratified split (not all classes have 2+ samples). train={len(X_train)}, test={len(X_test)}')
         
         # Verify test set is not empty
@@ -589,18 +1068,29 @@ def train_local_model(X, y, feature_columns):
         # ============================================
         # MODEL TRAINING: XGBoost
         # ============================================
+        # Early stopping monitors a stratified slice of the train split, so the
+        # hold-out test set never influences how many trees are kept. Every
+        # class keeps a fit sample, even one with a single train row
+        X_fit, y_fit = X_train, y_train
+        eval_set = None
+        if len(X_train) >= EARLY_STOPPING_MIN_SAMPLES:
+            fit_idx, val_idx = _split_indices(y_train, EARLY_STOPPING_VALIDATION_FRACTION)
+            if len(val_idx):
+                X_fit, y_fit = X_train[fit_idx], y_train[fit_idx]
+                eval_set = [(X_train[val_idx], y_train[val_idx])]
+        
         # Calculate scale_pos_weight for imbalanced classes (binary case)
         sample_weight = None
         if unique_classes == 2:
             # For binary: weight minority class more
             from sklearn.utils.class_weight import compute_sample_weight
-            sample_weight = compute_sample_weight('balanced', y_train)
+            sample_weight = compute_sample_weight('balanced', y_fit)
         else:
             # For multiclass: XGBoost handles it natively
             sample_weight = None
         
         model = XGBClassifier(
-            n_estimators=200,            # Number of boosting rounds
+            n_estimators=200,            # Max number of boosting rounds
             max_depth=6,                 # Max tree depth
             learning_rate=0.1,           # Learning rate (eta)
             objective='multi:softprob',  # Multi-class classification
@@ -609,23 +1099,39 @@ def train_local_model(X, y, feature_columns):
             random_state=42,             # Reproducibility
             use_label_encoder=False,     # Use LabelEncoder explicitly
             tree_method='hist',          # Faster histogram-based method
+            max_bin=128,                 # Smaller histograms, less memory traffic
+            n_jobs=TRAINING_N_JOBS,      # Threads for histogram tree building
             verbosity=0                  # Silent mode
         )
+        if eval_set is not None:
+            model.set_params(early_stopping_rounds=EARLY_STOPPING_ROUNDS)
         
-        # Train model
+        # Train model (float32 input is used by XGBoost without conversion)
         model.fit(
-            X_train, y_train,
+            X_fit, y_fit,
             sample_weight=sample_weight,
+            eval_set=eval_set,
             verbose=False
         )
         
-        logger.info(f'XGBoost model training complete. Classes: {unique_classes}')
+        if eval_set is not None:
+            logger.info(f'XGBoost model training complete. Classes: {unique_classes}, trees kept: {model.best_iteration + 1}')
+        else:
+            logger.info(f'XGBoost model training complete. Classes: {unique_classes}')
         
         # ============================================
         # VALIDATION #2: Cross-Validation on Train Set
         # ============================================
-        if len(X_train) > 100:  # Only if dataset large enough
-            cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
+        # Refits the model 5 more times, so it only runs when enabled in settings
+        if not TRAINING_CROSS_VALIDATION:
+            logger.info('Cross-validation disabled (TRAINING_CROSS_VALIDATION=False). Skipping CV.')
+            cv_scores = np.array([0.0])  # Placeholder
+            avg_cv_accuracy = 0.0
+            cv_std = 0.0
+        elif len(X_train) > 100:  # Only if dataset large enough
+            # CV folds have no eval set, so early stopping is switched off for them
+            cv_model = clone(model).set_params(early_stopping_rounds=None)
+            cv_scores = cross_val_score(cv_model, X_train, y_train, cv=5, scoring='accuracy')
             avg_cv_accuracy = cv_scores.mean()
             cv_std = cv_scores.std()
             logger.info(f'5-Fold CV Results: mean={avg_cv_accuracy:.4f}, std={cv_std:.4f}, scores={[f"{s:.4f}" for s in cv_scores]}')
@@ -635,22 +1141,22 @@ def train_local_model(X, y, feature_columns):
             avg_cv_accuracy = 0.0
             cv_std = 0.0
         
-        # Serialize model to binary for storage
-        model_binary = pickle.dumps(model)
+        # Serialize model to compressed binary for storage
+        model_binary = serialize_model(model)
         
         return {
             'model': model,
             'model_binary': model_binary,
             'label_encoder': label_encoder,
             'label_classes': list(label_encoder.classes_),
-            'scaler': scaler,
+            'scaler': {'mean': feature_mean.tolist(), 'std': feature_std.tolist()},
             'X_test': X_test,
             'y_test': y_test,
             'X_train': X_train,
             'y_train': y_train,
             'y_encoded_test': y_test,  # Already encoded
             'y_encoded_train': y_train,  # Already encoded
-            'classes': sorted(list(set(y))),
+            'classes': list(label_encoder.classes_),  # LabelEncoder classes are sorted
             'feature_columns': feature_columns,
             'cv_scores': cv_scores.tolist(),
             'cv_mean': float(avg_cv_accuracy),
@@ -667,7 +1173,17 @@ def train_local_model(X, y, feature_columns):
         }
 
 
-def evaluate_model(model_data):
+# Maximum training rows re-predicted to estimate train metrics for the overfitting check
+TRAIN_EVAL_MAX_SAMPLES = 2000
+
+
+def _class_distribution(y_encoded, label_classes):
+    """Count samples per class in one pass over label-encoded targets"""
+    counts = np.bincount(np.asarray(y_encoded, dtype=np.int64), minlength=len(label_classes))
+    return {str(c): int(n) for c, n in zip(label_classes, counts)}
+
+
+def evaluate_model(model_data, level='full'):
     """
     Compute performance metrics on HOLD-OUT TEST SET ONLY.
     This ensures realistic accuracy assessment and detects overfitting.
@@ -676,6 +1192,8 @@ def evaluate_model(model_data):
     
     Args:
         model_data: Dictionary from train_local_model()
+        level: 'full' (default) or 'summary'; summary skips ROC-AUC, the
+            per-class classification report and feature importance
     
     Returns:
         Dictionary with test metrics, train metrics comparison, classification report, or error
@@ -685,7 +1203,6 @@ def evaluate_model(model_data):
     
     try:
         model = model_data['model']
-        label_encoder = model_data['label_encoder']
         X_test = model_data['X_test']
         y_test = model_data['y_test']  # Already encoded (0, 1, 2, ...)
         X_train = model_data['X_train']
@@ -693,66 +1210,77 @@ def evaluate_model(model_data):
         label_classes = model_data['label_classes']
         feature_columns = model_data['feature_columns']
         
-        # Decode y_test and y_train back to original labels for metrics
-        y_test_decoded = label_encoder.inverse_transform(y_test)
-        y_train_decoded = label_encoder.inverse_transform(y_train)
+        # Metrics run on the encoded labels; class i is label_classes[i]
+        encoded_labels = list(range(len(label_classes)))
+        class_names = [str(label) for label in label_classes]
+        full = level == 'full'  # 'summary' skips metrics that are only stored for reporting
         
         # ============================================
         # VALIDATION #3: Test Set Evaluation
         # ============================================
         # Predictions on TEST set (hold-out data)
-        y_pred_test = model.predict(X_test)
+        # multi:softprob predict() is argmax of predict_proba(), so run the booster once
         y_pred_proba_test = model.predict_proba(X_test)
-        
-        # Decode predictions for metrics computation
-        y_pred_test_decoded = label_encoder.inverse_transform(y_pred_test)
+        y_pred_test = np.argmax(y_pred_proba_test, axis=1)
         
         # Metrics on TEST set
-        test_accuracy = accuracy_score(y_test_decoded, y_pred_test_decoded)
-        test_precision = precision_score(y_test_decoded, y_pred_test_decoded, average='weighted', zero_division=0)
-        test_recall = recall_score(y_test_decoded, y_pred_test_decoded, average='weighted', zero_division=0)
-        test_f1 = f1_score(y_test_decoded, y_pred_test_decoded, average='weighted', zero_division=0)
+        test_accuracy = accuracy_score(y_test, y_pred_test)
+        test_precision = precision_score(y_test, y_pred_test, average='weighted', zero_division=0)
+        test_recall = recall_score(y_test, y_pred_test, average='weighted', zero_division=0)
+        test_f1 = f1_score(y_test, y_pred_test, average='weighted', zero_division=0)
         
-        # Confusion matrix on TEST set
-        cm_test = confusion_matrix(y_test_decoded, y_pred_test_decoded, labels=label_classes)
+        # Confusion matrix on TEST set (rows/columns in label_classes order)
+        cm_test = confusion_matrix(y_test, y_pred_test, labels=encoded_labels)
         cm_test_list = cm_test.tolist()
         
         # ROC-AUC (only for binary classification)
         test_roc_auc = None
-        if len(label_classes) == 2:
+        if full and len(label_classes) == 2:
             try:
-                test_roc_auc = roc_auc_score(y_test_decoded, y_pred_proba_test[:, 1])
+                test_roc_auc = roc_auc_score(y_test, y_pred_proba_test[:, 1])
             except Exception as e:
                 logger.warning(f"Could not compute ROC-AUC: {str(e)}")
         
-        # Classification report on TEST set
-        class_report_str = classification_report(y_test_decoded, y_pred_test_decoded, labels=label_classes, zero_division=0)
-        logger.info(f"\n========== TEST SET CLASSIFICATION REPORT ==========\n{class_report_str}")
+        # Classification report on TEST set (text form is only needed for the log)
+        if full and logger.isEnabledFor(logging.INFO):
+            class_report_str = classification_report(y_test, y_pred_test, labels=encoded_labels, target_names=class_names, zero_division=0)
+            logger.info(f"\n========== TEST SET CLASSIFICATION REPORT ==========\n{class_report_str}")
         
-        # Parse classification report for structured storage
+        # Parse classification report for structured storage (one pass for all classes)
         class_report_dict = {}
-        for label in label_classes:
-            try:
-                report_dict_raw = classification_report(y_test_decoded, y_pred_test_decoded, labels=[label], output_dict=True, zero_division=0)
-                class_report_dict[str(label)] = {
-                    'precision': round(report_dict_raw[label]['precision'], 4),
-                    'recall': round(report_dict_raw[label]['recall'], 4),
-                    'f1-score': round(report_dict_raw[label]['f1-score'], 4),
-                    'support': int(report_dict_raw[label]['support'])
+        if full:
+            report_dict_raw = classification_report(y_test, y_pred_test, labels=encoded_labels, target_names=class_names, output_dict=True, zero_division=0)
+            for label in class_names:
+                label_report = report_dict_raw.get(label)
+                if label_report is None:
+                    logger.warning(f"Could not compute class report for {label}")
+                    continue
+                class_report_dict[label] = {
+                    'precision': round(label_report['precision'], 4),
+                    'recall': round(label_report['recall'], 4),
+                    'f1-score': round(label_report['f1-score'], 4),
+                    'support': int(label_report['support'])
                 }
-            except Exception as e:
-                logger.warning(f"Could not compute class report for {label}: {str(e)}")
         
         # ============================================
         # OVERFITTING DETECTION: Compare Train vs Test
         # ============================================
-        y_pred_train = model.predict(X_train)
-        y_pred_train_decoded = label_encoder.inverse_transform(y_pred_train)
+        # Train metrics only feed the overfitting gap, so a bounded random
+        # subsample estimates them without re-predicting the whole train set
+        if len(X_train) > TRAIN_EVAL_MAX_SAMPLES:
+            sample_idx = np.random.default_rng(42).choice(len(X_train), size=TRAIN_EVAL_MAX_SAMPLES, replace=False)
+            X_train_eval = X_train[sample_idx]
+            y_train_eval = y_train[sample_idx]
+        else:
+            X_train_eval = X_train
+            y_train_eval = y_train
+        
+        y_pred_train = model.predict(X_train_eval)
         
-        train_accuracy = accuracy_score(y_train_decoded, y_pred_train_decoded)
-        train_precision = precision_score(y_train_decoded, y_pred_train_decoded, average='weighted', zero_division=0)
-        train_recall = recall_score(y_train_decoded, y_pred_train_decoded, average='weighted', zero_division=0)
-        train_f1 = f1_score(y_train_decoded, y_pred_train_decoded, average='weighted', zero_division=0)
+        train_accuracy = accuracy_score(y_train_eval, y_pred_train)
+        train_precision = precision_score(y_train_eval, y_pred_train, average='weighted', zero_division=0)
+        train_recall = recall_score(y_train_eval, y_pred_train, average='weighted', zero_division=0)
+        train_f1 = f1_score(y_train_eval, y_pred_train, average='weighted', zero_division=0)
         
         # Calculate deltas (should be small for well-tuned model)
         accuracy_delta = abs(train_accuracy - test_accuracy)
@@ -775,10 +1303,12 @@ def evaluate_model(model_data):
         )
         
         # Extract XGBoost feature importance
-        try:
-            feature_importance = model.get_booster().get_score(importance_type='weight')
-        except:
-            feature_importance = {}
+        feature_importance = {}
+        if full:
+            try:
+                feature_importance = model.get_booster().get_score(importance_type='weight')
+            except:
+                feature_importance = {}
         
         metrics = {
             # Test set metrics (GROUND TRUTH)
@@ -806,17 +1336,17 @@ def evaluate_model(model_data):
             'num_test_samples': int(len(y_test)),
             'num_train_samples': int(len(y_train)),
             'num_classes': len(label_classes),
-            'class_distribution_test': {str(c): int(np.sum(y_test_decoded == c)) for c in label_classes},
-            'class_distribution_train': {str(c): int(np.sum(y_train_decoded == c)) for c in label_classes},
+            'class_distribution_test': _class_distribution(y_test, label_classes),
+            'class_distribution_train': _class_distribution(y_train, label_classes),
             'classification_report': class_report_dict
         }
         
         weights = {
             'model_type': 'xgboost_classifier',
-            'model_binary': model_data.get('model_binary'),  # Serialized model for storage
             'label_encoder_classes': label_classes,
             'label_encoder_mapping': {str(idx): cls for idx, cls in enumerate(label_classes)},
             'feature_names': feature_columns,
+            'scaler': model_data.get('scaler'),  # Standardization params for inference
             'feature_importance': feature_importance,
             'timestamp': datetime.utcnow().isoformat()
         }
@@ -837,19 +1367,54 @@ def evaluate_model(model_data):
         }
 
 
-def train_federated_model(phc_id, trigger_reason='manual'):
+# Single worker so background aggregations in one process never overlap
+_POST_TRAIN_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='post-train')
+
+
+def _post_train_pipeline(phc_id, run_analytics, auto_aggregate):
+    """Run drift/risk analytics and automatic aggregation after a training"""
+    ml_insights = {}
+    try:
+        if run_analytics:
+            # Drift detection and composite risk score, alerts written together
+            ml_insights = run_post_training_analytics([phc_id]).get(phc_id, {})
+        
+        # Attempt automatic aggregation if conditions are met
+        if auto_aggregate:
+            try_automatic_aggregation()
+    except Exception as e:
+        logger.error(f"Error in post-training pipeline for {phc_id}: {str(e)}", exc_info=True)
+    return ml_insights
+
+
+def train_federated_model(phc_id, trigger_reason='manual', auto_aggregate=True, run_analytics=True,
+                          background=False, eval_level='full'):
     """
     Train model on local PHC data and create model update.
     
     Args:
         phc_id: PHC identifier (e.g., 'PHC1')
         trigger_reason: How training was triggered ('manual', 'patient_threshold', 'time_threshold')
+        auto_aggregate: Attempt automatic aggregation after training (default True)
+        run_analytics: Run drift/risk analytics now; batch callers pass False and
+            use run_post_training_analytics instead (default True)
+        background: Run analytics/aggregation on a background thread and return
+            as soon as the LocalModel is saved; ml_insights is then empty (default False)
+        eval_level: evaluate_model level; 'summary' stores no ROC-AUC, per-class
+            report or feature importance (default 'full')
     
     Returns:
         Dictionary with metrics and update_id
     """
     try:
-        patients = list(Patient.objects.filter(phc_id=phc_id))
+        feature_columns = FEATURE_COLUMNS
+        
+        # Fetch only the feature columns and label, as raw documents
+        patients = list(
+            Patient.objects.filter(phc_id=phc_id)
+            .only(*feature_columns, 'disease_label')
+            .as_pymongo()
+        )
         
         # Empty dataset
         if not patients:
@@ -866,23 +1431,8 @@ def train_federated_model(phc_id, trigger_reason='manual'):
                 'triggered_by': trigger_reason
             }
         
-        feature_columns = [
-            'fever',
-            'cough',
-            'fatigue',
-            'headache',
-            'vomiting',
-            'breathlessness',
-            'temperature_c',
-            'heart_rate',
-            'bp_systolic',
-            'wbc_count',
-            'platelet_count',
-            'hemoglobin'
-        ]
-        
         # Preprocess
-        X, y, features = preprocess_data(patients, feature_columns)
+        X, y_encoded, label_encoder, features = preprocess_data(patients, feature_columns)
         
         if len(X) == 0:
             return {
@@ -899,7 +1449,7 @@ def train_federated_model(phc_id, trigger_reason='manual'):
             }
         
         # Train
-        model_data = train_local_model(X, y, features)
+        model_data = train_local_model(X, y_encoded, label_encoder, features)
         
         if 'error' in model_data:
             return {
@@ -916,7 +1466,7 @@ def train_federated_model(phc_id, trigger_reason='manual'):
             }
         
         # Evaluate
-        eval_result = evaluate_model(model_data)
+        eval_result = evaluate_model(model_data, level=eval_level)
         
         if eval_result.get('error'):
             return {
@@ -936,8 +1486,9 @@ def train_federated_model(phc_id, trigger_reason='manual'):
         weights = eval_result['weights']
         
         # Get next version number
-        latest_version = LocalModel.objects.filter(phc_id=phc_id).order_by('-version').first()
-        next_version = (latest_version.version + 1) if latest_version else 1
+        # Index-only lookup of the highest version number, served by (phc_id, -version)
+        latest_version = LocalModel.objects.filter(phc_id=phc_id).order_by('-version').scalar('version').first()
+        next_version = (latest_version + 1) if latest_version else 1
         version_string = generate_local_version_string(phc_id, next_version)
         
         # Save to MongoDB with structured schema
@@ -955,6 +1506,7 @@ def train_federated_model(phc_id, trigger_reason='manual'):
             sample_count=eval_result['num_samples'],
             num_test_samples=metrics['num_test_samples'],
             num_train_samples=metrics['num_train_samples'],
+            model_binary=model_data.get('model_binary'),  # Raw booster bytes, outside the weights dict
             weights={
                 **weights,
                 'train_accuracy': metrics['train_accuracy'],  # Store train metrics for comparison
@@ -971,6 +1523,7 @@ def train_federated_model(phc_id, trigger_reason='manual'):
             triggered_by=trigger_reason,
             aggregated=False
         )
+        invalidate_local_model_cache(phc_id)
         
         # Record training completion
         record_training_completion(phc_id)
@@ -979,14 +1532,12 @@ def train_federated_model(phc_id, trigger_reason='manual'):
         # ML INNOVATION: RUN AFTER-TRAINING ANALYTICS
         # ============================================
         
-        # 1. Detect model drift
-        drift_result = detect_model_drift(phc_id)
-        
-        # 2. Calculate composite risk score
-        risk_result = calculate_composite_risk_score(phc_id)
-        
-        # Attempt automatic aggregation if conditions are met
-        try_automatic_aggregation()
+        ml_insights = {}
+        if background:
+            if run_analytics or auto_aggregate:
+                _POST_TRAIN_POOL.submit(_post_train_pipeline, phc_id, run_analytics, auto_aggregate)
+        else:
+            ml_insights = _post_train_pipeline(phc_id, run_analytics, auto_aggregate)
         
         return {
             'error': None,
@@ -1006,10 +1557,7 @@ def train_federated_model(phc_id, trigger_reason='manual'):
             'version': next_version,
             'version_string': version_string,
             'triggered_by': trigger_reason,
-            'ml_insights': {
-                'drift_detection': drift_result,
-                'composite_risk_score': risk_result
-            },
+            'ml_insights': ml_insights,
             'timestamp': datetime.utcnow().isoformat()
         }
     
@@ -1041,7 +1589,7 @@ def try_automatic_aggregation():
         return aggregate_models(automatic=True)
 
 
-def handle_patient_creation(phc_id):
+def handle_patient_creation(phc_id, count=1):
     """
     ============================================
     COMPLETE POST-PATIENT-CREATION PIPELINE
@@ -1056,15 +1604,16 @@ def handle_patient_creation(phc_id):
     
     Args:
         phc_id (str): PHC identifier (e.g., 'PHC1')
+        count (int): Number of patients created (batch submissions pass the batch size)
     
     Returns:
         dict: Training result with status and details
     """
     try:
-        logger.info(f"Patient creation detected for {phc_id}")
+        logger.info(f"Patient creation detected for {phc_id} ({count} new)")
         
         # Step 1: Increment patient count
-        increment_patient_count(phc_id)
+        increment_patient_count(phc_id, count)
         logger.debug(f"Patient count incremented for {phc_id}")
         
         # Step 2: Check if training should be triggered
@@ -1072,11 +1621,11 @@ def handle_patient_creation(phc_id):
         logger.info(f"{phc_id} training check: should_train={should_train}, reason={trigger_reason}")
         
         if not should_train:
-            # Training not triggered yet
-            metadata = TrainingMetadata.objects.filter(phc_id=phc_id).first()
-            if metadata:
-                current_count = metadata.patients_since_last_training
-                logger.debug(f"{phc_id} has {current_count}/{PATIENT_THRESHOLD} patients for training")
+            # Training not triggered yet (progress lookup only feeds the debug log)
+            if logger.isEnabledFor(logging.DEBUG):
+                current_count = TrainingMetadata.objects.filter(phc_id=phc_id).scalar('patients_since_last_training').first()
+                if current_count is not None:
+                    logger.debug(f"{phc_id} has {current_count}/{PATIENT_THRESHOLD} patients for training")
             
             return {
                 'model_trained': False,
@@ -1087,9 +1636,9 @@ def handle_patient_creation(phc_id):
         # Step 3: Training threshold reached - trigger training
         logger.info(f"[TRAINING TRIGGERED] {phc_id} - Reason: {trigger_reason}")
         
-        # HACKATHON FIX: Check if training already in progress (prevent duplicate)
-        metadata = TrainingMetadata.objects.filter(phc_id=phc_id).first()
-        if metadata and metadata.training_in_progress:
+        # HACKATHON FIX: Claim the training lock atomically (prevent duplicate)
+        # A held lock means another worker is training; locks of crashed workers expire
+        if not acquire_phc_locks('training', [phc_id]):
             logger.info(f"{phc_id} training already in progress, skipping")
             return {
                 'model_trained': False,
@@ -1097,19 +1646,15 @@ def handle_patient_creation(phc_id):
                 'phc_id': phc_id
             }
         
-        # Set training lock
-        if metadata:
-            metadata.training_in_progress = True
-            metadata.save()
-        
         try:
             # Call the main training function
-            result = train_federated_model(phc_id, trigger_reason=trigger_reason)
+            # Analytics and aggregation run in the background so the patient request returns
+            result = train_federated_model(
+                phc_id, trigger_reason=trigger_reason, background=True, eval_level='summary'
+            )
             
             if result.get('error'):
                 logger.error(f"Training error for {phc_id}: {result['error']}")
-                # Release lock on error
-                record_training_completion(phc_id, success=False)
                 return {
                     'model_trained': False,
                     'error': result['error'],
@@ -1124,9 +1669,7 @@ def handle_patient_creation(phc_id):
                 f"Samples: {result.get('num_samples', 0)}"
             )
             
-            # Release training lock
-            record_training_completion(phc_id, success=True)
-            
+            # train_federated_model already recorded the completion
             return {
                 'model_trained': True,
                 'phc_id': phc_id,
@@ -1146,14 +1689,16 @@ def handle_patient_creation(phc_id):
                 f"[TRAINING EXCEPTION] {phc_id} - {type(training_error).__name__}: {str(training_error)}",
                 exc_info=True
             )
-            # Release lock on exception
-            record_training_completion(phc_id, success=False)
             return {
                 'model_trained': False,
                 'error': f'Training execution failed: {str(training_error)}',
                 'phc_id': phc_id,
                 'trigger_reason': trigger_reason
             }
+        
+        finally:
+            # Only the lock holder releases the lock, whatever the outcome
+            release_phc_locks('training', [phc_id])
     
     except Exception as e:
         logger.error(
@@ -1169,6 +1714,17 @@ def handle_patient_creation(phc_id):
     return None
 
 
+# Column order of the per-contributor metric matrix (sample_count last, used as weight)
+CONTRIBUTOR_METRIC_COLUMNS = ('accuracy', 'precision', 'recall', 'f1_score', 'sample_count')
+_contributor_metrics = attrgetter(*CONTRIBUTOR_METRIC_COLUMNS)
+
+# Latest local model of a contributing PHC, as read by aggregate_models
+PHCModelRecord = namedtuple(
+    'PHCModelRecord',
+    'model_id version version_string accuracy precision recall f1_score sample_count'
+)
+
+
 def aggregate_models(automatic=False):
     """
     Federated aggregation of all PHC models.
@@ -1185,34 +1741,53 @@ def aggregate_models(automatic=False):
         automatic: Whether aggregation was triggered automatically
     """
     try:
+        # One timestamp for the stored metadata and the returned payload
+        now_iso = datetime.utcnow().isoformat()
+        
         # Find all unaggregated models (or latest models)
         phc_models = {}
         total_samples = 0
         contributor_versions = {}
         
-        for phc_num in range(1, 5):
-            phc_id = f'PHC_{phc_num}'
-            
-            # Get latest unaggregated model for this PHC
-            if automatic:
-                latest = LocalModel.objects.filter(phc_id=phc_id, aggregated=False).order_by('-trained_at').first()
-            else:
-                latest = LocalModel.objects.filter(phc_id=phc_id).order_by('-trained_at').first()
-            
+        phc_ids = [f'PHC_{phc_num}' for phc_num in range(1, 5)]
+        
+        # Latest (unaggregated, if automatic) model per PHC in one pipeline,
+        # projecting only the metric fields (weights are never needed here)
+        match = {'phc_id': {'$in': phc_ids}}
+        if automatic:
+            match['aggregated'] = False
+        latest_by_phc = {row['_id']: row for row in LocalModel.objects.aggregate([
+            {'$match': match},
+            {'$sort': {'phc_id': 1, 'trained_at': -1}},
+            {'$group': {
+                '_id': '$phc_id',
+                'model_id': {'$first': '$_id'},
+                'version': {'$first': '$version'},
+                'version_string': {'$first': '$version_string'},
+                'accuracy': {'$first': '$accuracy'},
+                'precision': {'$first': '$precision'},
+                'recall': {'$first': '$recall'},
+                'f1_score': {'$first': '$f1_score'},
+                'sample_count': {'$first': '$sample_count'}
+            }}
+        ])}
+        
+        for phc_id in phc_ids:
+            latest = latest_by_phc.get(phc_id)
             if latest:
-                phc_models[phc_id] = {
-                    'model_id': str(latest.id),
-                    'version': latest.version,
-                    'version_string': latest.version_string,
-                    'accuracy': latest.accuracy,
-                    'precision': latest.precision,
-                    'recall': latest.recall,
-                    'f1_score': latest.f1_score,
-                    'weights': latest.weights,
-                    'sample_count': latest.sample_count
-                }
-                contributor_versions[phc_id] = latest.version_string
-                total_samples += latest.sample_count
+                record = PHCModelRecord(
+                    model_id=str(latest['model_id']),
+                    version=latest['version'],
+                    version_string=latest['version_string'],
+                    accuracy=latest['accuracy'],
+                    precision=latest.get('precision') or 0.0,
+                    recall=latest.get('recall') or 0.0,
+                    f1_score=latest.get('f1_score') or 0.0,
+                    sample_count=latest.get('sample_count') or 0
+                )
+                phc_models[phc_id] = record
+                contributor_versions[phc_id] = record.version_string
+                total_samples += record.sample_count
         
         if not phc_models:
             return None
@@ -1220,15 +1795,20 @@ def aggregate_models(automatic=False):
         num_contributors = len(phc_models)
         contributors = list(phc_models.keys())
         
-        # Weighted averaging of metrics (FedAvg by sample count)
-        aggregated_accuracy = sum(m['accuracy'] * m['sample_count'] for m in phc_models.values()) / total_samples if total_samples > 0 else 0.0
-        aggregated_precision = sum(m['precision'] * m['sample_count'] for m in phc_models.values()) / total_samples if total_samples > 0 else 0.0
-        aggregated_recall = sum(m['recall'] * m['sample_count'] for m in phc_models.values()) / total_samples if total_samples > 0 else 0.0
-        aggregated_f1 = sum(m['f1_score'] * m['sample_count'] for m in phc_models.values()) / total_samples if total_samples > 0 else 0.0
+        # Weighted averaging of metrics (FedAvg by sample count), one vectorized reduction
+        model_matrix = np.array(
+            [_contributor_metrics(m) for m in phc_models.values()], dtype=np.float64
+        )
+        try:
+            aggregated_metrics = np.average(model_matrix[:, :4], axis=0, weights=model_matrix[:, 4])
+        except ZeroDivisionError:  # No samples across contributors
+            aggregated_metrics = np.zeros(4)
+        # Round once; the same Python floats are stored and returned
+        aggregated_accuracy, aggregated_precision, aggregated_recall, aggregated_f1 = np.round(aggregated_metrics, 4).tolist()
         
         # Get next version number
-        latest_global = GlobalModel.objects.order_by('-version').first()
-        next_version = (latest_global.version + 1) if latest_global else 1
+        latest_global_version = GlobalModel.objects.order_by('-version').scalar('version').first()
+        next_version = (latest_global_version + 1) if latest_global_version else 1
         version_string = generate_global_version_string(next_version)
         
         # For XGBoost: Store ensemble metadata instead of averaged weights
@@ -1238,22 +1818,17 @@ def aggregate_models(automatic=False):
             'ensemble_strategy': 'probability_averaging',
             'num_contributors': num_contributors,
             'total_samples': total_samples,
-            'accuracy': round(float(aggregated_accuracy), 4),
-            'precision': round(float(aggregated_precision), 4),
-            'recall': round(float(aggregated_recall), 4),
-            'f1_score': round(float(aggregated_f1), 4),
+            'accuracy': aggregated_accuracy,
+            'precision': aggregated_precision,
+            'recall': aggregated_recall,
+            'f1_score': aggregated_f1,
             'contributor_models': contributor_versions,  # Map of phc_id -> model_version_string
-            'contributor_metrics': {
-                phc_id: {
-                    'accuracy': m['accuracy'],
-                    'precision': m['precision'],
-                    'recall': m['recall'],
-                    'f1_score': m['f1_score'],
-                    'sample_count': m['sample_count']
-                }
-                for phc_id, m in phc_models.items()
-            },
-            'timestamp': datetime.utcnow().isoformat(),
+            # One row per contributor (same order as contributors), columns as named
+            'contributor_metrics_columns': list(CONTRIBUTOR_METRIC_COLUMNS),
+            'contributor_metrics_matrix': [
+                [*metrics, int(sample_count)] for *metrics, sample_count in model_matrix.tolist()
+            ],
+            'timestamp': now_iso,
             'note': 'For inference: load all contributor models and average their probability predictions'
         }
         
@@ -1261,20 +1836,21 @@ def aggregate_models(automatic=False):
         global_model = GlobalModel.objects.create(
             version=next_version,
             version_string=version_string,
-            accuracy=round(float(aggregated_accuracy), 4),
+            accuracy=aggregated_accuracy,
             contributors=contributors,
             contributor_versions=contributor_versions,
             weights=aggregated_weights,
             aggregation_triggered_by='automatic' if automatic else 'manual'
         )
         
-        # Mark contributing models as aggregated
-        for phc_id, model_info in phc_models.items():
-            LocalModel.objects.filter(id=model_info['model_id']).update(
-                aggregated=True,
-                aggregated_in_version=next_version,
-                aggregated_in_version_string=version_string
-            )
+        invalidate_global_model_cache()
+        
+        # Mark contributing models as aggregated (one multi-document update)
+        LocalModel.objects(id__in=[m.model_id for m in phc_models.values()]).update(
+            set__aggregated=True,
+            set__aggregated_in_version=next_version,
+            set__aggregated_in_version_string=version_string
+        )
         
         # Broadcast global model to all PHCs
         broadcast_global_model(next_version, version_string)
@@ -1284,14 +1860,14 @@ def aggregate_models(automatic=False):
         return {
             'version': next_version,
             'version_string': version_string,
-            'accuracy': round(float(aggregated_accuracy), 4),
+            'accuracy': aggregated_accuracy,
             'contributors': contributors,
             'contributor_versions': contributor_versions,
             'num_contributors': num_contributors,
             'total_samples': total_samples,
             'automatic': automatic,
             'ensemble_strategy': 'probability_averaging',
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': now_iso
         }
     
     except Exception as e:
@@ -1299,10 +1875,41 @@ def aggregate_models(automatic=False):
         return None
 
 
+def _daily_fever_series(daily_rows, start_date, end_date):
+    """
+    Daily fever counts from start_date through end_date (inclusive), in date order.
+    
+    Days without a row (no patients that day) count as zero fever cases.
+    
+    Args:
+        daily_rows: [{'_id': 'YYYY-MM-DD', 'fever_count': n}, ...] from the daily $group
+        start_date: First day of the series (date)
+        end_date: Last day of the series (date)
+    
+    Returns:
+        np.ndarray of float64, one value per day
+    """
+    start = np.datetime64(start_date, 'D')
+    fever_counts = np.zeros(int((np.datetime64(end_date, 'D') - start).astype(np.int64)) + 1)
+    if daily_rows:
+        days = np.array([row['_id'] for row in daily_rows], dtype='datetime64[D]')
+        day_offsets = (days - start).astype(np.int64)
+        in_range = (day_offsets >= 0) & (day_offsets < len(fever_counts))
+        counts = np.fromiter(
+            (row['fever_count'] for row in daily_rows), dtype=np.float64, count=len(daily_rows)
+        )
+        fever_counts[day_offsets[in_range]] = counts[in_range]
+    return fever_counts
+
+
 def detect_fever_outbreak(phc_id, lookback_days=7):
     """
     Detect fever outbreak using 7-day rolling average and Z-score.
     
+    The daily series runs from the first patient in the 14-day window
+    through today; days without patients count as zero fever cases, so
+    the latest reading is always today's.
+    
     Args:
         phc_id: PHC identifier
         lookback_days: Number of days for rolling average (default 7)
@@ -1311,11 +1918,18 @@ def detect_fever_outbreak(phc_id, lookback_days=7):
         Dictionary with outbreak_flag and z_score
     """
     try:
-        # Get patients from last 14 days
-        cutoff_date = datetime.utcnow() - timedelta(days=14)
-        patients = list(Patient.objects.filter(phc_id=phc_id, created_at__gte=cutoff_date))
-        
-        if not patients:
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=14)
+        
+        # Short-circuit on the earliest patient in the window (one index seek):
+        # the daily series can't span lookback_days if it started too recently
+        first_created_at = (
+            Patient.objects(phc_id=phc_id, created_at__gte=cutoff_date)
+            .order_by('created_at')
+            .scalar('created_at')
+            .first()
+        )
+        if first_created_at is None:
             return {
                 'phc_id': phc_id,
                 'outbreak_flag': False,
@@ -1324,36 +1938,45 @@ def detect_fever_outbreak(phc_id, lookback_days=7):
                 'error': 'Not enough historical data'
             }
         
-        # Group by date
-        df = pd.DataFrame([
-            {
-                'date': p.created_at.date() if hasattr(p.created_at, 'date') else p.created_at,
-                'fever': p.fever
+        days_available = (now.date() - first_created_at.date()).days + 1
+        if days_available < lookback_days:
+            return {
+                'phc_id': phc_id,
+                'outbreak_flag': False,
+                'z_score': 0.0,
+                'sample_size': days_available,
+                'error': f'Need at least {lookback_days} days of data'
             }
-            for p in patients
-        ])
         
-        # Daily fever count
-        daily_fever = df.groupby('date')['fever'].sum().reset_index()
-        daily_fever.columns = ['date', 'fever_count']
-        daily_fever = daily_fever.sort_values('date')
-        
-        if len(daily_fever) < lookback_days:
+        # Daily fever counts for the last 14 days, grouped server-side (at most 14 rows)
+        daily_rows = list(Patient.objects.aggregate([
+            {'$match': {'phc_id': phc_id, 'created_at': {'$gte': cutoff_date}}},
+            {'$group': {
+                '_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}},
+                'fever_count': {'$sum': '$fever'}
+            }},
+            {'$sort': {'_id': 1}}
+        ]))
+        
+        if not daily_rows:
             return {
                 'phc_id': phc_id,
                 'outbreak_flag': False,
                 'z_score': 0.0,
-                'sample_size': len(daily_fever),
-                'error': f'Need at least {lookback_days} days of data'
+                'sample_size': 0,
+                'error': 'Not enough historical data'
             }
         
-        # Calculate rolling average
-        daily_fever['rolling_avg'] = daily_fever['fever_count'].rolling(window=lookback_days).mean()
+        # Daily fever count through today (same span as days_available), missing days are 0
+        fever_counts = _daily_fever_series(daily_rows, first_created_at.date(), now.date())
+        
+        # Calculate rolling average (one value per full window)
+        rolling_avg = np.convolve(fever_counts, np.ones(lookback_days) / lookback_days, mode='valid')
         
         # Get latest reading
-        latest_fever = daily_fever.iloc[-1]['fever_count']
-        rolling_mean = daily_fever['rolling_avg'].dropna().mean()
-        rolling_std = daily_fever['rolling_avg'].dropna().std()
+        latest_fever = fever_counts[-1]
+        rolling_mean = rolling_avg.mean()
+        rolling_std = rolling_avg.std(ddof=1) if len(rolling_avg) > 1 else 0.0
         
         # Prevent division by zero
         if rolling_std == 0 or rolling_std is None or rolling_std != rolling_std:
@@ -1364,8 +1987,8 @@ def detect_fever_outbreak(phc_id, lookback_days=7):
         outbreak_flag = abs(z_score) > 2.0
         
         # Get latest model versions for versioning
-        latest_local_model = get_latest_local_model(phc_id)
-        latest_global_model = get_latest_global_model()
+        latest_local_model = get_latest_local_model(phc_id, 'version', 'version_string')
+        latest_global_model = get_latest_global_model('version', 'version_string')
         
         local_version = latest_local_model.version if latest_local_model else 0
         local_version_string = latest_local_model.version_string if latest_local_model else None
@@ -1395,7 +2018,7 @@ def detect_fever_outbreak(phc_id, lookback_days=7):
             'z_score': round(float(z_score), 4),
             'latest_fever_count': int(latest_fever),
             'rolling_mean': round(float(rolling_mean), 2),
-            'sample_size': len(daily_fever),
+            'sample_size': len(fever_counts),
             'local_model_version': local_version,
             'local_model_version_string': local_version_string,
             'global_model_version': global_version,
@@ -1411,4 +2034,3 @@ def detect_fever_outbreak(phc_id, lookback_days=7):
             'z_score': 0.0,
             'error': f'Outbreak detection failed: {str(e)}'
         }
-
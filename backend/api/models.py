@@ -1,5 +1,6 @@
 import json
-from mongoengine import Document, StringField, IntField, FloatField, ListField, DictField, DateTimeField, BooleanField, ReferenceField
+from functools import lru_cache
+from mongoengine import Document, StringField, IntField, FloatField, ListField, DictField, DateTimeField, BooleanField, ReferenceField, BinaryField
 from datetime import datetime
 
 # ============================================
@@ -97,7 +98,9 @@ class Patient(Document):
             'disease_label',
             'patient_id',
             'created_at', 
-            ('phc_id', 'created_at'),
+            ('phc_id', 'created_at', 'fever'),  # Covers fever outbreak daily counts
+            ('phc_id', '-created_at', 'severity_level', 'disease_label'),  # Covers risk score counts
+            ('phc_id', 'fever', 'wbc_count', 'disease_label'),  # Covers composite risk aggregation
             ('city', 'created_at'),
             ('phc_id', 'disease_label'),
             ('city', 'disease_label'),
@@ -106,18 +109,45 @@ class Patient(Document):
     }
 
 
+class IdSequence(Document):
+    """Atomic counter for human-readable ids (e.g., patient_id), one document per sequence"""
+    name = StringField(primary_key=True)
+    value = IntField(default=0)  # Last number handed out
+
+    meta = {
+        'collection': 'id_sequences'
+    }
+
+
 class TrainingMetadata(Document):
     """Track federated training cycles for each PHC"""
     phc_id = StringField(required=True, unique=True)
     last_training_at = DateTimeField()
     patients_since_last_training = IntField(default=0)
     last_aggregated_version = IntField(default=0)
-    training_in_progress = BooleanField(default=False)  # HACKATHON FIX: Prevent duplicate training
     updated_at = DateTimeField(default=datetime.utcnow)
+    # Duplicate training is prevented by a PHCLock named 'training', which expires
+    # if the worker crashes (older documents may still carry training_in_progress)
     
     meta = {
         'collection': 'training_metadata',
-        'indexes': ['phc_id']
+        'indexes': ['phc_id'],
+        'strict': False
+    }
+
+
+class PHCLock(Document):
+    """Short-lived per-PHC lock for a named job; MongoDB expires stale locks"""
+    name = StringField(required=True)  # Job holding the lock, e.g., "analytics", "training"
+    phc_id = StringField(required=True)
+    acquired_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'phc_locks',
+        'indexes': [
+            {'fields': ('name', 'phc_id'), 'unique': True},
+            {'fields': ['acquired_at'], 'expireAfterSeconds': 600}  # Release locks of crashed workers
+        ]
     }
 
 
@@ -135,7 +165,8 @@ class LocalModel(Document):
     sample_count = IntField(default=0)
     num_test_samples = IntField(default=0)
     num_train_samples = IntField(default=0)
-    weights = DictField(required=True)
+    weights = DictField(required=True)  # Training metadata and metrics (JSON)
+    model_binary = BinaryField()  # Serialized model, format-prefixed (ml_utils.serialize_model)
     trained_at = DateTimeField(default=datetime.utcnow)
     triggered_by = StringField(default='unknown')  # 'patient_threshold' or 'time_threshold' or 'manual'
     aggregated = BooleanField(default=False)
@@ -148,7 +179,7 @@ class LocalModel(Document):
             'phc_id', 'version', 'trained_at', 'version_string',
             ('phc_id', '-trained_at'),
             ('phc_id', '-version'),
-            'aggregated'
+            ('aggregated', 'phc_id')  # Covers pending-PHC distinct in aggregation trigger
         ]
     }
 
@@ -184,7 +215,10 @@ class ModelBroadcast(Document):
 
     meta = {
         'collection': 'model_broadcast',
-        'indexes': ['phc_id', 'global_model_version', ('phc_id', '-received_at')]
+        'indexes': [
+            'phc_id', 'global_model_version', ('phc_id', '-received_at'),
+            ('phc_id', 'global_model_version')  # Broadcast upsert key
+        ]
     }
 
 
@@ -330,27 +364,35 @@ class CohortSnapshot(Document):
 # COMPATIBILITY WRAPPER
 # ============================================
 
+class PHCPatientManager:
+    """Patient queries scoped to a single PHC"""
+    
+    def __init__(self, phc_id):
+        self.phc_id = phc_id
+    
+    def all(self):
+        return Patient.objects.filter(phc_id=self.phc_id)
+    
+    def create(self, **kwargs):
+        kwargs['phc_id'] = self.phc_id
+        return Patient.objects.create(**kwargs)
+    
+    def filter(self, **kwargs):
+        kwargs['phc_id'] = self.phc_id
+        return Patient.objects.filter(**kwargs)
+
+
+class PHCPatientWrapper:
+    """Patient-like accessor exposing a PHC-scoped `objects` manager"""
+    
+    def __init__(self, phc_id):
+        self.objects = PHCPatientManager(phc_id)
+
+
+@lru_cache(maxsize=16)
 def get_phc_collection(phc_id):
     """
     Backward compatibility wrapper.
-    Returns Patient class filtered by phc_id.
+    Returns a Patient-like accessor filtered by phc_id (cached per PHC).
     """
-    class PHCPatientWrapper:
-        class ObjectsManager:
-            def __init__(self, phc_id):
-                self.phc_id = phc_id
-            
-            def all(self):
-                return Patient.objects.filter(phc_id=self.phc_id)
-            
-            def create(self, **kwargs):
-                kwargs['phc_id'] = self.phc_id
-                return Patient.objects.create(**kwargs)
-            
-            def filter(self, **kwargs):
-                kwargs['phc_id'] = self.phc_id
-                return Patient.objects.filter(**kwargs)
-        
-        objects = ObjectsManager(phc_id)
-    
-    return PHCPatientWrapper
+    return PHCPatientWrapper(phc_id)
@@ -0,0 +1,32 @@
+import orjson
+from bson import ObjectId
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_drf_encoder = JSONEncoder()
+
+
+def _default(obj):
+    """Fallback for types orjson does not encode natively (ObjectId, Decimal, lazy strings)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    return _drf_encoder.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson.
+    
+    orjson encodes datetimes, NumPy arrays and NumPy scalars natively, so
+    metric and weight payloads skip the per-element Python encoder path.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    
+    options = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=self.options)
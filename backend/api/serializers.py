@@ -1,5 +1,4 @@
 from rest_framework import serializers
-from api.models import User, ModelUpdate, GlobalModel
 
 class UserSerializer(serializers.Serializer):
     id = serializers.CharField(read_only=True)
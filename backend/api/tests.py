@@ -10,9 +10,20 @@ Tests core functionality:
 """
 
 import json
-from datetime import datetime
+import threading
+import time
+from datetime import date, datetime
+from unittest import mock
+import numpy as np
+from bson import ObjectId
 from django.test import TestCase, Client
+from sklearn.preprocessing import LabelEncoder
+from api import authentication
+from api.authentication import generate_token, hash_password, verify_password
+from api.city_risk_calculator import get_risk_severity_level, get_risk_severity_levels
+from api.ml_utils import FEATURE_COLUMNS, _daily_fever_series, train_local_model
 from api.models import User, Patient, LocalModel, GlobalModel, Alert, PHC
+from api.views import compute_cohort_feature_stats, parse_patient_payload
 from rest_framework import status
 
 
@@ -82,6 +93,101 @@ class AuthenticationTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class TokenCacheTests(TestCase):
+    """Test validated-token caching in JWTAuthentication."""
+    
+    def setUp(self):
+        self.auth = authentication
+        self.auth._token_cache.clear()
+    
+    def test_cached_user_returned_before_expiry(self):
+        """Cached token returns the stored user without re-validation."""
+        sentinel = object()
+        self.auth._cache_user('token-a', sentinel, time.time() + 60)
+        self.assertIs(self.auth._get_cached_user('token-a'), sentinel)
+    
+    def test_expired_entry_is_evicted(self):
+        """Entries past the token exp claim are never served."""
+        self.auth._cache_user('token-b', object(), time.time() - 1)
+        self.assertIsNone(self.auth._get_cached_user('token-b'))
+        self.assertNotIn('token-b', self.auth._token_cache)
+
+
+class UserFetchCoalescingTests(TestCase):
+    """Test coalesced user lookups for cold tokens."""
+    
+    def test_fetcher_returns_after_one_batch(self):
+        """Ids queued during a fetch are resolved by a new leader, not by the original fetcher."""
+        first_id, second_id, third_id = (str(ObjectId()) for _ in range(3))
+        queries = []
+        first_query_started = threading.Event()
+        release_first_query = threading.Event()
+        release_next_query = threading.Event()
+        
+        class FakeUser:
+            def __init__(self, uid):
+                self.id = uid
+            
+            @staticmethod
+            def objects(id__in):
+                queries.append((threading.current_thread().name, sorted(id__in)))
+                if len(queries) == 1:
+                    first_query_started.set()
+                    release_first_query.wait(5)
+                else:
+                    release_next_query.wait(5)
+                return [FakeUser(uid) for uid in id__in]
+        
+        results = {}
+        
+        def lookup(uid):
+            results[uid] = authentication._fetch_user(uid)
+        
+        with mock.patch.object(authentication, 'User', FakeUser):
+            fetcher = threading.Thread(target=lookup, args=(first_id,), name='fetcher')
+            fetcher.start()
+            self.assertTrue(first_query_started.wait(5))
+            
+            # More ids keep arriving while the first batch is in flight
+            waiters = [
+                threading.Thread(target=lookup, args=(uid,), name=f'waiter-{uid}')
+                for uid in (second_id, third_id)
+            ]
+            for thread in waiters:
+                thread.start()
+            deadline = time.time() + 5
+            while len(authentication._queued_user_fetches) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            
+            release_first_query.set()
+            fetcher.join(5)
+            # The fetcher has returned although the next batch is still running
+            self.assertFalse(fetcher.is_alive())
+            
+            release_next_query.set()
+            for thread in waiters:
+                thread.join(5)
+        
+        self.assertEqual(queries[0], ('fetcher', [first_id]))
+        self.assertEqual(len(queries), 2)
+        self.assertNotEqual(queries[1][0], 'fetcher')
+        self.assertEqual(queries[1][1], sorted([second_id, third_id]))
+        self.assertEqual({uid: user.id for uid, user in results.items()},
+                         {uid: uid for uid in (first_id, second_id, third_id)})
+        self.assertFalse(authentication._user_fetch_active)
+
+
+class PasswordVerifyTests(TestCase):
+    """Test bcrypt verify with the in-memory fast path."""
+    
+    def test_verify_password_roundtrip(self):
+        """Correct password verifies (twice, second via cache); wrong one does not."""
+        hashed = hash_password('testpass123')
+        self.assertTrue(verify_password('testpass123', hashed))
+        self.assertTrue(verify_password('testpass123', hashed))
+        self.assertFalse(verify_password('wrongpass', hashed))
+
+
 class PatientManagementTests(TestCase):
     """Test patient submission and retrieval."""
     
@@ -97,7 +203,6 @@ class PatientManagementTests(TestCase):
         )
         
         # Get login token
-        from api.authentication import generate_token
         self.token = generate_token(str(self.user.id))
     
     def test_patient_submission(self):
@@ -120,6 +225,41 @@ class PatientManagementTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn('patient_id', response.json())
     
+    def test_batch_submission_validates_before_insert(self):
+        """Batch endpoint rejects a batch with an invalid record and writes nothing."""
+        records = [
+            {'age': 35, 'temperature_c': 38.2, 'heart_rate': 90, 'bp_systolic': 120,
+             'wbc_count': 7500, 'platelet_count': 250000, 'hemoglobin': 13.1,
+             'disease_label': 'Dengue'},
+            {'age': 40}
+        ]
+        response = self.client.post(
+            '/api/phc/patients/batch/',
+            data=json.dumps(records),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Patient 1', response.json()['error'])
+        self.assertEqual(Patient.objects.filter(phc_id='PHC1').count(), 0)
+    
+    def test_batch_submission_rejects_invalid_document(self):
+        """A record that fails document validation returns 400 for that record, not 500."""
+        record = {
+            'age': 35, 'temperature_c': 38.2, 'heart_rate': 90, 'bp_systolic': 120,
+            'wbc_count': 7500, 'platelet_count': 250000, 'hemoglobin': 13.1,
+            'disease_label': 'Dengue'
+        }
+        response = self.client.post(
+            '/api/phc/patients/batch/',
+            data=json.dumps([record, dict(record, gender=None)]),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(response.json()['error'].startswith('Patient 1: '))
+        self.assertEqual(Patient.objects.filter(phc_id='PHC1').count(), 0)
+    
     def test_patient_retrieval(self):
         """Test retrieving patients for a PHC."""
         # Submit a patient first
@@ -156,7 +296,6 @@ class AggregationTests(TestCase):
             phc_id=None
         )
         
-        from api.authentication import generate_token
         self.admin_token = generate_token(str(self.admin.id))
     
     def test_aggregation_endpoint(self):
@@ -184,7 +323,6 @@ class AlertsTests(TestCase):
             phc_id=None
         )
         
-        from api.authentication import generate_token
         self.officer_token = generate_token(str(self.officer.id))
     
     def test_alerts_retrieval(self):
@@ -219,7 +357,6 @@ class DashboardTests(TestCase):
             phc_id=None
         )
         
-        from api.authentication import generate_token
         self.phc_token = generate_token(str(self.phc_user.id))
         self.admin_token = generate_token(str(self.admin.id))
     
@@ -307,6 +444,86 @@ class FederatedLearningTests(TestCase):
         self.assertAlmostEqual(w1 + w2, 1.0, places=5)  # Weights sum to 1
 
 
+class RiskSeverityTests(TestCase):
+    """Test risk score to severity level mapping."""
+    
+    def test_vectorized_matches_scalar(self):
+        """Batch severity classification agrees with the scalar version at every boundary."""
+        scores = [0.0, 0.2499, 0.25, 0.49, 0.5, 0.7499, 0.75, 1.0]
+        expected = [get_risk_severity_level(s) for s in scores]
+        self.assertEqual(list(get_risk_severity_levels(scores)), expected)
+        self.assertEqual(expected, ['LOW', 'LOW', 'MEDIUM', 'MEDIUM', 'HIGH', 'HIGH', 'CRITICAL', 'CRITICAL'])
+
+
+class LocalTrainingTests(TestCase):
+    """Test local XGBoost training on small and imbalanced datasets."""
+    
+    def test_two_sample_class_survives_early_stopping_split(self):
+        """A class with one train row stays in the fit set when early stopping is used."""
+        rng = np.random.default_rng(0)
+        labels = np.array(['Dengue'] * 100 + ['Malaria'] * 100 + ['Typhoid'] * 2)
+        label_encoder = LabelEncoder()
+        y_encoded = label_encoder.fit_transform(labels).astype(np.int32)
+        X = rng.normal(size=(len(labels), len(FEATURE_COLUMNS))).astype(np.float32)
+        
+        result = train_local_model(X, y_encoded, label_encoder, FEATURE_COLUMNS)
+        
+        self.assertNotIn('error', result)
+        self.assertEqual(result['model'].n_classes_, 3)
+
+
+class DailyFeverSeriesTests(TestCase):
+    """Test the densified daily fever series used by outbreak detection."""
+    
+    def test_gaps_and_trailing_days_are_zero(self):
+        """Days without patients, including those after the last patient, count as zero."""
+        rows = [
+            {'_id': '2026-01-01', 'fever_count': 3},
+            {'_id': '2026-01-04', 'fever_count': 5},
+        ]
+        series = _daily_fever_series(rows, date(2026, 1, 1), date(2026, 1, 7))
+        self.assertEqual(series.tolist(), [3.0, 0.0, 0.0, 5.0, 0.0, 0.0, 0.0])
+
+
+class CohortFeatureStatsTests(TestCase):
+    """Test vectorized cohort symptom counts and averages."""
+    
+    def test_counts_and_averages_skip_missing(self):
+        """Symptoms count only value 1; averages ignore missing and zero readings."""
+        docs = [
+            {'fever': 1, 'cough': 0, 'age': 30, 'wbc_count': 8000},
+            {'fever': 1, 'cough': 1, 'age': None, 'wbc_count': 0},
+            {'fever': 0, 'age': 50},
+        ]
+        symptom_counts, averages = compute_cohort_feature_stats(docs)
+        self.assertEqual(symptom_counts['fever'], 2)
+        self.assertEqual(symptom_counts['cough'], 1)
+        self.assertEqual(averages['age'], 40.0)
+        self.assertEqual(averages['wbc_count'], 8000.0)
+        self.assertEqual(averages['hemoglobin'], 0.0)
+
+
+class PatientPayloadTests(TestCase):
+    """Test patient payload coercion."""
+    
+    def test_coerces_types_and_reports_missing(self):
+        """String numerics are converted, defaults are filled, blank required fields are missing."""
+        fields, missing = parse_patient_payload({
+            'age': '45', 'temperature_c': 38, 'heart_rate': 90, 'bp_systolic': 120,
+            'wbc_count': '8000', 'platelet_count': 250000, 'hemoglobin': 13.5,
+            'disease_label': '', 'fever': '1'
+        })
+        self.assertEqual(missing, ['disease_label'])
+        self.assertEqual(fields['age'], 45)
+        self.assertEqual(fields['temperature_c'], 38.0)
+        self.assertIsInstance(fields['temperature_c'], float)
+        self.assertEqual(fields['wbc_count'], 8000)
+        self.assertEqual(fields['fever'], 1)
+        self.assertEqual(fields['cough'], 0)
+        self.assertEqual(fields['gender'], 'Unknown')
+        self.assertEqual(fields['severity_level'], 'Low')
+
+
 class HealthCheckTests(TestCase):
     """Test health check endpoint."""
     
@@ -12,13 +12,19 @@ All endpoints enforce strict privacy-first data isolation.
 """
 
 import logging
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
 from datetime import datetime, timedelta
+import numpy as np
+from pymongo import MongoClient
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
-from api.models import User, LocalModel, GlobalModel, Patient, PHC, Alert, CohortSnapshot
+from mongoengine.errors import NotUniqueError, ValidationError as DocumentValidationError
+from api.models import User, LocalModel, GlobalModel, Patient, PHC, Alert, CohortSnapshot, IdSequence
 from api.authentication import (
     hash_password, verify_password, generate_token, JWTAuthentication
 )
@@ -33,6 +39,18 @@ from api.ml_utils import (
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def raw_mongo_client():
+    """Shared PyMongo client for the raw-collection reads below (one connection pool per process)"""
+    return MongoClient('mongodb://localhost:27017/')
+
+# Fields rendered by the read-only views; these read raw documents (no Document hydration)
+ALERT_LIST_FIELDS = ('phc_id', 'alert_type', 'risk_score', 'severity', 'created_at', 'message')
+LOCAL_MODEL_METRIC_FIELDS = (
+    'sample_count', 'version_string', 'accuracy', 'precision', 'recall', 'f1_score', 'trained_at'
+)
+
+
 # ============================================
 # STANDARDIZED ERROR RESPONSE HELPER
 # ============================================
@@ -72,7 +90,8 @@ def get_phc_aggregated_metrics(phc_id):
         dict: Aggregated model metrics (no patient data)
     """
     try:
-        latest_model = LocalModel.objects.filter(phc_id=phc_id).order_by('-version').first()
+        # Cached per PHC for LOCAL_MODEL_CACHE_TTL seconds, invalidated on training
+        latest_model = get_latest_local_model(phc_id, *LOCAL_MODEL_METRIC_FIELDS)
         
         if not latest_model:
             return {
@@ -104,6 +123,10 @@ def get_phc_aggregated_metrics(phc_id):
         }
 
 
+ACCESS_GRANTED = (True, "Access granted")
+ACCESS_DENIED_OTHER_PHC = (False, "Access denied: You can only access your assigned PHC")
+
+
 def validate_phc_access(user, requested_phc_id):
     """
     Enforce: PHC users can ONLY access their own PHC data.
@@ -111,10 +134,151 @@ def validate_phc_access(user, requested_phc_id):
     Returns:
         tuple: (is_allowed: bool, reason: str)
     """
-    if user.role == 'PHC_USER':
-        if user.phc_id != requested_phc_id:
-            return False, f"Access denied: You can only access your assigned PHC"
-    return True, "Access granted"
+    if user.role != 'PHC_USER' or user.phc_id == requested_phc_id:
+        return ACCESS_GRANTED
+    return ACCESS_DENIED_OTHER_PHC
+
+
+# ============================================
+# PATIENT PAYLOAD HELPERS
+# ============================================
+
+# Map PHC to city (handle both PHC1 and PHC_1 formats)
+PHC_TO_CITY = {
+    'PHC1': 'Mumbai', 'PHC_1': 'Mumbai',
+    'PHC2': 'Delhi', 'PHC_2': 'Delhi',
+    'PHC3': 'Bangalore', 'PHC_3': 'Bangalore',
+    'PHC4': 'Chennai', 'PHC_4': 'Chennai',
+    'PHC5': 'Kolkata', 'PHC_5': 'Kolkata'
+}
+
+# Submitted patient fields: name -> (type, default). Fields without a default
+# are required; a None type keeps the submitted value as-is.
+_REQUIRED = object()
+PATIENT_PAYLOAD_FIELDS = {
+    # Demographics
+    'age': (int, _REQUIRED),
+    'gender': (None, 'Unknown'),
+    # Symptoms (binary 0/1)
+    'fever': (int, 0),
+    'cough': (int, 0),
+    'fatigue': (int, 0),
+    'headache': (int, 0),
+    'vomiting': (int, 0),
+    'breathlessness': (int, 0),
+    # Vital Signs
+    'temperature_c': (float, _REQUIRED),
+    'heart_rate': (int, _REQUIRED),
+    'bp_systolic': (int, _REQUIRED),
+    # Lab Values
+    'wbc_count': (int, _REQUIRED),
+    'platelet_count': (int, _REQUIRED),
+    'hemoglobin': (float, _REQUIRED),
+    # Diagnosis
+    'disease_label': (None, _REQUIRED),
+    'severity_level': (None, 'Low'),
+}
+
+
+def parse_patient_payload(data):
+    """
+    Coerce a submitted patient payload into Patient field values.
+    
+    Values JSON already decoded to the target type are used as-is; strings
+    and other numerics go through int()/float().
+    
+    Args:
+        data (dict): Parsed request body
+    
+    Returns:
+        tuple: (fields: dict, missing_fields: list)
+    
+    Raises:
+        ValueError: If a value cannot be converted to its field type
+    """
+    fields = {}
+    missing_fields = []
+    for name, (cast, default) in PATIENT_PAYLOAD_FIELDS.items():
+        value = data.get(name, default)
+        if value is _REQUIRED or (default is _REQUIRED and value == ''):
+            missing_fields.append(name)
+        elif cast is None or type(value) is cast:
+            fields[name] = value
+        else:
+            fields[name] = cast(value)
+    return fields, missing_fields
+
+
+def allocate_patient_ids(count):
+    """
+    Reserve count sequential patient_ids (P00001, ...) with one atomic $inc.
+    
+    Concurrent submissions always get disjoint ranges. On first use the
+    sequence is seeded from the current patient count, so numbering
+    continues from existing records.
+    
+    Args:
+        count (int): Number of ids to reserve
+    
+    Returns:
+        list: patient_id strings in order
+    """
+    sequence = IdSequence.objects(name='patient_id').modify(inc__value=count, new=True)
+    if sequence is None:
+        try:
+            IdSequence(name='patient_id', value=Patient.objects.count()).save(force_insert=True)
+        except NotUniqueError:
+            pass  # Another worker seeded the sequence first
+        sequence = IdSequence.objects(name='patient_id').modify(inc__value=count, new=True)
+    
+    first_number = sequence.value - count + 1
+    return [f"P{number:05d}" for number in range(first_number, sequence.value + 1)]
+
+
+# ============================================
+# COHORT METRIC HELPERS
+# ============================================
+
+COHORT_SYMPTOM_FIELDS = ('fever', 'cough', 'fatigue', 'headache', 'vomiting', 'breathlessness')
+COHORT_AVERAGE_FIELDS = (
+    'age', 'temperature_c', 'heart_rate', 'bp_systolic',
+    'wbc_count', 'platelet_count', 'hemoglobin'
+)
+
+
+def compute_cohort_feature_stats(patients_docs):
+    """
+    Compute symptom counts and vital/lab averages for a cohort with NumPy.
+    
+    Each document is read once into a single matrix; counts and averages are
+    column reductions. Missing or zero readings are excluded from averages.
+    
+    Args:
+        patients_docs (list): Raw patient documents (dicts)
+    
+    Returns:
+        tuple: (symptom_counts, averages) dicts keyed by field name
+    """
+    fields = COHORT_SYMPTOM_FIELDS + COHORT_AVERAGE_FIELDS
+    values = np.array(
+        [[p.get(field) or 0 for field in fields] for p in patients_docs],
+        dtype=float
+    ).reshape(len(patients_docs), len(fields))
+    
+    symptoms = values[:, :len(COHORT_SYMPTOM_FIELDS)]
+    readings = values[:, len(COHORT_SYMPTOM_FIELDS):]
+    
+    symptom_counts = np.count_nonzero(symptoms == 1, axis=0)
+    present = np.count_nonzero(readings, axis=0)
+    averages = np.divide(
+        readings.sum(axis=0), present,
+        out=np.zeros(len(COHORT_AVERAGE_FIELDS)), where=present > 0
+    )
+    
+    return (
+        dict(zip(COHORT_SYMPTOM_FIELDS, symptom_counts.tolist())),
+        dict(zip(COHORT_AVERAGE_FIELDS, averages.tolist()))
+    )
 
 
 # ============================================
@@ -205,7 +369,16 @@ class LoginView(APIView):
                     'error': 'Username and password are required'
                 }, status=status.HTTP_401_UNAUTHORIZED)
 
-            user = User.objects.get(username=username)
+            # Unique username index lookup, loading only the fields login needs
+            user = User.objects(username=username).only(
+                'username', 'password_hash', 'role', 'phc_id'
+            ).first()
+
+            if user is None:
+                logger.warning(f"Login attempt with non-existent user")
+                return Response({
+                    'error': 'Invalid username or password'
+                }, status=status.HTTP_401_UNAUTHORIZED)
 
             if not verify_password(password, user.password_hash):
                 logger.warning(f"Failed login attempt: {username}")
@@ -226,12 +399,6 @@ class LoginView(APIView):
                 }
             }, status=status.HTTP_200_OK)
 
-        except User.DoesNotExist:
-            logger.warning(f"Login attempt with non-existent user")
-            return Response({
-                'error': 'Invalid username or password'
-            }, status=status.HTTP_401_UNAUTHORIZED)
-
         except Exception as e:
             logger.error(f"Login error: {str(e)}", exc_info=True)
             return Response({
@@ -256,58 +423,24 @@ class PatientSubmitView(APIView):
                 }, status=status.HTTP_403_FORBIDDEN)
 
             phc_id = request.user.phc_id
+            city = PHC_TO_CITY.get(phc_id, 'Unknown')
             
-            # Map PHC to city (handle both PHC1 and PHC_1 formats)
-            phc_to_city = {
-                'PHC1': 'Mumbai', 'PHC_1': 'Mumbai',
-                'PHC2': 'Delhi', 'PHC_2': 'Delhi',
-                'PHC3': 'Bangalore', 'PHC_3': 'Bangalore',
-                'PHC4': 'Chennai', 'PHC_4': 'Chennai',
-                'PHC5': 'Kolkata', 'PHC_5': 'Kolkata'
-            }
-            city = phc_to_city.get(phc_id, 'Unknown')
-            
-            # Validate required fields (18-column schema)
-            required_fields = [
-                'age', 'temperature_c', 'heart_rate', 'bp_systolic',
-                'wbc_count', 'platelet_count', 'hemoglobin', 'disease_label'
-            ]
-            missing_fields = [f for f in required_fields if f not in request.data or request.data.get(f) == '']
+            # Validate required fields and coerce types (18-column schema)
+            patient_fields, missing_fields = parse_patient_payload(request.data)
             if missing_fields:
                 return Response({
                     'error': f'Missing required fields: {", ".join(missing_fields)}'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Generate unique patient_id
-            patient_count = Patient.objects.count() + 1
-            patient_id = f"P{patient_count:05d}"
+            patient_id = allocate_patient_ids(1)[0]
             
             # Create patient record with 18 columns
             patient = Patient.objects.create(
                 patient_id=patient_id,
                 phc_id=phc_id,
                 city=city,
-                # Demographics
-                age=int(request.data.get('age')),
-                gender=request.data.get('gender', 'Unknown'),
-                # Symptoms (binary 0/1)
-                fever=int(request.data.get('fever', 0)),
-                cough=int(request.data.get('cough', 0)),
-                fatigue=int(request.data.get('fatigue', 0)),
-                headache=int(request.data.get('headache', 0)),
-                vomiting=int(request.data.get('vomiting', 0)),
-                breathlessness=int(request.data.get('breathlessness', 0)),
-                # Vital Signs
-                temperature_c=float(request.data.get('temperature_c')),
-                heart_rate=int(request.data.get('heart_rate')),
-                bp_systolic=int(request.data.get('bp_systolic')),
-                # Lab Values
-                wbc_count=int(request.data.get('wbc_count')),
-                platelet_count=int(request.data.get('platelet_count')),
-                hemoglobin=float(request.data.get('hemoglobin')),
-                # Diagnosis
-                disease_label=request.data.get('disease_label'),
-                severity_level=request.data.get('severity_level', 'Low')
+                **patient_fields
             )
             
             logger.info(f"Patient submitted for {phc_id}: {patient.disease_label}")
@@ -340,8 +473,7 @@ class PatientSubmitView(APIView):
         """Create a cohort snapshot for historical tracking after patient submission."""
         try:
             # Use PyMongo directly to avoid mongoengine schema caching issues
-            from pymongo import MongoClient
-            client = MongoClient('mongodb://localhost:27017/')
+            client = raw_mongo_client()
             db_name = 'fedhealth_db'  # Match the database used by mongoengine
             db = client[db_name]
             patients_col = db['patients']
@@ -353,67 +485,43 @@ class PatientSubmitView(APIView):
             
             total = len(patients_docs)
             
+            # Calculate symptom counts and vital/lab averages in one pass
+            symptom_counts, averages = compute_cohort_feature_stats(patients_docs)
+            
             # Calculate demographics
-            ages = [p.get('age') for p in patients_docs if p.get('age')]
-            avg_age = sum(ages) / len(ages) if ages else 0
-            males = sum(1 for p in patients_docs if p.get('gender') == 'Male')
-            females = sum(1 for p in patients_docs if p.get('gender') == 'Female')
+            genders = [p.get('gender') for p in patients_docs]
+            males = genders.count('Male')
+            females = genders.count('Female')
             male_pct = (males / total * 100) if total > 0 else 0
             female_pct = (females / total * 100) if total > 0 else 0
             
-            # Calculate symptoms
-            fever_count = sum(1 for p in patients_docs if p.get('fever') == 1)
-            cough_count = sum(1 for p in patients_docs if p.get('cough') == 1)
-            fatigue_count = sum(1 for p in patients_docs if p.get('fatigue') == 1)
-            headache_count = sum(1 for p in patients_docs if p.get('headache') == 1)
-            vomiting_count = sum(1 for p in patients_docs if p.get('vomiting') == 1)
-            breathlessness_count = sum(1 for p in patients_docs if p.get('breathlessness') == 1)
-            
-            # Calculate vital signs
-            temps = [p.get('temperature_c') for p in patients_docs if p.get('temperature_c')]
-            avg_temp = sum(temps) / len(temps) if temps else 0
-            hrs = [p.get('heart_rate') for p in patients_docs if p.get('heart_rate')]
-            avg_hr = sum(hrs) / len(hrs) if hrs else 0
-            bps = [p.get('bp_systolic') for p in patients_docs if p.get('bp_systolic')]
-            avg_bp = sum(bps) / len(bps) if bps else 0
-            
-            # Calculate lab values
-            wbcs = [p.get('wbc_count') for p in patients_docs if p.get('wbc_count')]
-            avg_wbc = sum(wbcs) / len(wbcs) if wbcs else 0
-            platelets = [p.get('platelet_count') for p in patients_docs if p.get('platelet_count')]
-            avg_platelet = sum(platelets) / len(platelets) if platelets else 0
-            hbs = [p.get('hemoglobin') for p in patients_docs if p.get('hemoglobin')]
-            avg_hb = sum(hbs) / len(hbs) if hbs else 0
-            
             # Calculate disease distribution
-            disease_dist = {}
-            for p in patients_docs:
-                disease = p.get('disease_label', 'Unknown')
-                disease_dist[disease] = disease_dist.get(disease, 0) + 1
+            disease_dist = dict(Counter(p.get('disease_label', 'Unknown') for p in patients_docs))
             
             # Calculate severity
-            high_severity = sum(1 for p in patients_docs if p.get('severity_level') in ['High', 'Critical'])
+            severities = [p.get('severity_level') for p in patients_docs]
+            high_severity = severities.count('High') + severities.count('Critical')
             high_severity_pct = (high_severity / total * 100) if total > 0 else 0
             
             # Create snapshot
             snapshot = CohortSnapshot.objects.create(
                 phc_id=phc_id,
                 total_patients=total,
-                average_age=round(avg_age, 2),
+                average_age=round(averages['age'], 2),
                 male_percentage=round(male_pct, 2),
                 female_percentage=round(female_pct, 2),
-                fever_percentage=round((fever_count / total * 100), 2),
-                cough_percentage=round((cough_count / total * 100), 2),
-                fatigue_percentage=round((fatigue_count / total * 100), 2),
-                headache_percentage=round((headache_count / total * 100), 2),
-                vomiting_percentage=round((vomiting_count / total * 100), 2),
-                breathlessness_percentage=round((breathlessness_count / total * 100), 2),
-                average_temperature_c=round(avg_temp, 2),
-                average_heart_rate=round(avg_hr, 2),
-                average_bp_systolic=round(avg_bp, 2),
-                average_wbc_count=round(avg_wbc, 0),
-                average_platelet_count=round(avg_platelet, 0),
-                average_hemoglobin=round(avg_hb, 2),
+                fever_percentage=round((symptom_counts['fever'] / total * 100), 2),
+                cough_percentage=round((symptom_counts['cough'] / total * 100), 2),
+                fatigue_percentage=round((symptom_counts['fatigue'] / total * 100), 2),
+                headache_percentage=round((symptom_counts['headache'] / total * 100), 2),
+                vomiting_percentage=round((symptom_counts['vomiting'] / total * 100), 2),
+                breathlessness_percentage=round((symptom_counts['breathlessness'] / total * 100), 2),
+                average_temperature_c=round(averages['temperature_c'], 2),
+                average_heart_rate=round(averages['heart_rate'], 2),
+                average_bp_systolic=round(averages['bp_systolic'], 2),
+                average_wbc_count=round(averages['wbc_count'], 0),
+                average_platelet_count=round(averages['platelet_count'], 0),
+                average_hemoglobin=round(averages['hemoglobin'], 2),
                 disease_distribution=disease_dist,
                 high_severity_percentage=round(high_severity_pct, 2),
                 snapshot_date=datetime.now()
@@ -423,6 +531,86 @@ class PatientSubmitView(APIView):
             logger.error(f"Failed to create cohort snapshot: {str(e)}", exc_info=True)
 
 
+class BatchPatientSubmitView(PatientSubmitView):
+    """Submit a batch of patient records in one request (e.g., end-of-day sync)."""
+    
+    MAX_BATCH_SIZE = 1000
+
+    def post(self, request):
+        try:
+            if request.user.role != 'PHC_USER':
+                return Response({
+                    'error': 'Only PHC users can submit patients'
+                }, status=status.HTTP_403_FORBIDDEN)
+
+            records = request.data
+            if not isinstance(records, list) or not records:
+                return Response({
+                    'error': 'Request body must be a non-empty list of patient records'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if len(records) > self.MAX_BATCH_SIZE:
+                return Response({
+                    'error': f'Batch too large: at most {self.MAX_BATCH_SIZE} patients per request'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            phc_id = request.user.phc_id
+            city = PHC_TO_CITY.get(phc_id, 'Unknown')
+            
+            # Validate the whole batch before writing (or allocating ids for) anything
+            patients = []
+            for index, record in enumerate(records):
+                if not isinstance(record, dict):
+                    return Response({
+                        'error': f'Patient {index}: record must be an object'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    patient_fields, missing_fields = parse_patient_payload(record)
+                except (TypeError, ValueError) as e:
+                    return Response({
+                        'error': f'Patient {index}: invalid data type: {str(e)}'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                if missing_fields:
+                    return Response({
+                        'error': f'Patient {index}: missing required fields: {", ".join(missing_fields)}'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                # patient_id is a placeholder until the batch is known to be valid
+                patient = Patient(patient_id='', phc_id=phc_id, city=city, **patient_fields)
+                try:
+                    patient.validate()
+                except DocumentValidationError as e:
+                    return Response({
+                        'error': f'Patient {index}: {str(e)}'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                patients.append(patient)
+            
+            # One atomic reservation of sequential patient_ids for the whole batch
+            for patient, patient_id in zip(patients, allocate_patient_ids(len(patients))):
+                patient.patient_id = patient_id
+            
+            # One insert_many round trip for the whole batch
+            inserted_ids = Patient.objects.insert(patients, load_bulk=False)
+            
+            logger.info(f"Batch of {len(inserted_ids)} patients submitted for {phc_id}")
+            
+            # Snapshot and training trigger run once per batch, not per patient
+            self._create_cohort_snapshot(phc_id)
+            training_result = handle_patient_creation(phc_id, count=len(inserted_ids))
+            
+            return Response({
+                'message': 'Patients recorded successfully',
+                'inserted': len(inserted_ids),
+                'ids': [str(patient_id) for patient_id in inserted_ids],
+                'training': training_result
+            }, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            logger.error(f"Batch patient submission error: {str(e)}", exc_info=True)
+            return Response({
+                'error': f'Patient submission failed: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class PHCPatientsView(APIView):
     """Retrieve all patients for the authenticated PHC user."""
     authentication_classes = [JWTAuthentication]
@@ -444,8 +632,7 @@ class PHCPatientsView(APIView):
                 return error_response(reason, status_code=status.HTTP_403_FORBIDDEN)[0]
             
             # Query both databases - new submissions in 'fedhealth', seed data in 'fedhealth_db'
-            from pymongo import MongoClient
-            client = MongoClient('mongodb://localhost:27017/')
+            client = raw_mongo_client()
             
             all_patients = []
             
@@ -541,11 +728,10 @@ class AggregateModelsView(APIView):
             logger.info("Aggregation requested by district admin")
             
             # Auto-trigger training for any PHC with >= 20 patients that hasn't trained yet
-            from api.models import Patient, LocalModel
             for phc_num in range(1, 5):
                 phc_id = f'PHC_{phc_num}'
                 patient_count = Patient.objects.filter(phc_id=phc_id).count()
-                has_model = LocalModel.objects.filter(phc_id=phc_id).first() is not None
+                has_model = LocalModel.objects.filter(phc_id=phc_id).only('id').as_pymongo().first() is not None
                 
                 if patient_count >= 20 and not has_model:
                     logger.info(f"Auto-training {phc_id} ({patient_count} patients)")
@@ -598,16 +784,16 @@ class SurveillanceAlertsView(APIView):
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
             alerts = Alert.objects.filter(
                 created_at__gte=thirty_days_ago
-            ).order_by('-created_at')[:100]
+            ).order_by('-created_at').only(*ALERT_LIST_FIELDS).as_pymongo()[:100]
             
             alert_data = [{
-                'id': str(a.id),
-                'phc_id': a.phc_id,
-                'alert_type': a.alert_type,
-                'risk_score': round(float(a.risk_score), 2) if a.risk_score else 0,
-                'severity': a.severity,
-                'created_at': a.created_at.isoformat(),
-                'message': a.message
+                'id': str(a['_id']),
+                'phc_id': a['phc_id'],
+                'alert_type': a.get('alert_type', 'FEVER_OUTBREAK'),
+                'risk_score': round(float(a['risk_score']), 2) if a.get('risk_score') else 0,
+                'severity': a.get('severity', 'MEDIUM'),
+                'created_at': a['created_at'].isoformat(),
+                'message': a.get('message')
             } for a in alerts]
             
             logger.info(f"Retrieved {len(alert_data)} alerts")
@@ -646,45 +832,51 @@ class PHCDashboardMetricsView(APIView):
             phc_id = request.user.phc_id
             
             # Get latest local model
-            latest_model = LocalModel.objects.filter(phc_id=phc_id).order_by('-trained_at').first()
+            latest_model = (
+                LocalModel.objects.filter(phc_id=phc_id).order_by('-trained_at')
+                .only('version', 'version_string', 'accuracy', 'trained_at').as_pymongo().first()
+            )
             
             model_accuracy = 0.0
             model_version = None
             drift_detected = False
             
             if latest_model:
-                model_accuracy = float(latest_model.accuracy) if latest_model.accuracy else 0.0
-                model_version = latest_model.version_string
+                model_accuracy = float(latest_model['accuracy']) if latest_model.get('accuracy') else 0.0
+                model_version = latest_model['version_string']
                 
                 # Check for drift (>10% accuracy drop)
-                if latest_model.version > 1:
+                if latest_model['version'] > 1:
                     previous_model = LocalModel.objects.filter(
                         phc_id=phc_id,
-                        version=latest_model.version - 1
-                    ).first()
+                        version=latest_model['version'] - 1
+                    ).only('accuracy').as_pymongo().first()
                     
-                    if previous_model and previous_model.accuracy:
-                        accuracy_drop = float(previous_model.accuracy) - model_accuracy
+                    if previous_model and previous_model.get('accuracy'):
+                        accuracy_drop = float(previous_model['accuracy']) - model_accuracy
                         drift_detected = accuracy_drop > 10.0
             
             # Get patient count
             patient_count = Patient.objects.filter(phc_id=phc_id).count()
             
             # Get latest risk score
-            latest_alert = Alert.objects.filter(phc_id=phc_id).order_by('-created_at').first()
-            risk_score = float(latest_alert.risk_score) if latest_alert else 0.0
-            alert_severity = latest_alert.severity if latest_alert else 'UNKNOWN'
+            latest_alert = (
+                Alert.objects.filter(phc_id=phc_id).order_by('-created_at')
+                .only('risk_score', 'severity').as_pymongo().first()
+            )
+            risk_score = float(latest_alert['risk_score']) if latest_alert else 0.0
+            alert_severity = latest_alert.get('severity', 'MEDIUM') if latest_alert else 'UNKNOWN'
             
             # Get alert history
             alerts_7_days = Alert.objects.filter(
                 phc_id=phc_id,
                 created_at__gte=datetime.utcnow() - timedelta(days=7)
-            ).order_by('created_at')
+            ).order_by('created_at').only('created_at', 'risk_score', 'severity').as_pymongo()
             
             alert_history = [{
-                'date': a.created_at.isoformat(),
-                'risk_score': round(float(a.risk_score), 2),
-                'severity': a.severity
+                'date': a['created_at'].isoformat(),
+                'risk_score': round(float(a['risk_score']), 2),
+                'severity': a.get('severity', 'MEDIUM')
             } for a in alerts_7_days]
             
             logger.info(f"PHC Dashboard accessed for {phc_id}")
@@ -694,7 +886,7 @@ class PHCDashboardMetricsView(APIView):
                 'model': {
                     'version': model_version,
                     'accuracy': round(model_accuracy, 4),
-                    'last_trained': latest_model.trained_at.isoformat() if latest_model else None
+                    'last_trained': latest_model['trained_at'].isoformat() if latest_model else None
                 },
                 'drift': {
                     'detected': drift_detected,
@@ -732,33 +924,61 @@ class DistrictDashboardMetricsView(APIView):
                 )[0]
             
             # Get global model
-            latest_global = GlobalModel.objects.order_by('-version').first()
+            latest_global = (
+                GlobalModel.objects.order_by('-version')
+                .only('version', 'accuracy', 'contributors').as_pymongo().first()
+            )
             
             global_accuracy = 0.0
             contributors = []
             
             if latest_global:
-                global_accuracy = float(latest_global.accuracy) if latest_global.accuracy else 0.0
-                contributors = latest_global.contributors or []
+                global_accuracy = float(latest_global['accuracy']) if latest_global.get('accuracy') else 0.0
+                contributors = latest_global.get('contributors') or []
             
             # Get all PHCs
-            phc_ids = set([u.phc_id for u in User.objects.filter(role='PHC_USER') if u.phc_id])
+            phc_ids = [phc_id for phc_id in User.objects.filter(role='PHC_USER').distinct('phc_id') if phc_id]
+            
+            # Latest local model, latest alert and patient count for every PHC,
+            # one grouped query each instead of three queries per PHC
+            latest_locals = {row['_id']: row for row in LocalModel.objects.aggregate([
+                {'$match': {'phc_id': {'$in': phc_ids}}},
+                {'$sort': {'phc_id': 1, 'trained_at': -1}},
+                {'$group': {
+                    '_id': '$phc_id',
+                    'version_string': {'$first': '$version_string'},
+                    'accuracy': {'$first': '$accuracy'}
+                }}
+            ])}
+            latest_alerts = {row['_id']: row for row in Alert.objects.aggregate([
+                {'$match': {'phc_id': {'$in': phc_ids}}},
+                {'$sort': {'phc_id': 1, 'created_at': -1}},
+                {'$group': {
+                    '_id': '$phc_id',
+                    'risk_score': {'$first': '$risk_score'},
+                    'severity': {'$first': '$severity'}
+                }}
+            ])}
+            patient_counts = {row['_id']: row['count'] for row in Patient.objects.aggregate([
+                {'$match': {'phc_id': {'$in': phc_ids}}},
+                {'$group': {'_id': '$phc_id', 'count': {'$sum': 1}}}
+            ])}
             
             phc_metrics = []
             high_risk_phcs = []
             
             for phc_id in phc_ids:
-                latest_local = LocalModel.objects.filter(phc_id=phc_id).order_by('-trained_at').first()
-                latest_alert = Alert.objects.filter(phc_id=phc_id).order_by('-created_at').first()
-                patient_count = Patient.objects.filter(phc_id=phc_id).count()
+                latest_local = latest_locals.get(phc_id)
+                latest_alert = latest_alerts.get(phc_id)
+                patient_count = patient_counts.get(phc_id, 0)
                 
-                risk_score = float(latest_alert.risk_score) if latest_alert else 0.0
-                severity = latest_alert.severity if latest_alert else 'UNKNOWN'
+                risk_score = float(latest_alert['risk_score']) if latest_alert else 0.0
+                severity = latest_alert['severity'] if latest_alert else 'UNKNOWN'
                 
                 phc_data = {
                     'phc_id': phc_id,
-                    'local_model_version': latest_local.version_string if latest_local else 'Not trained',
-                    'local_model_accuracy': round(float(latest_local.accuracy), 4) if latest_local else 0.0,
+                    'local_model_version': latest_local['version_string'] if latest_local else 'Not trained',
+                    'local_model_accuracy': round(float(latest_local['accuracy']), 4) if latest_local else 0.0,
                     'risk_score': round(risk_score, 2),
                     'severity': severity,
                     'patients': patient_count
@@ -773,14 +993,14 @@ class DistrictDashboardMetricsView(APIView):
             
             # Calculate average risk score across all PHCs (capped at 100)
             if phc_metrics:
-                avg_risk = sum([p['risk_score'] for p in phc_metrics]) / len(phc_metrics)
+                avg_risk = sum(map(itemgetter('risk_score'), phc_metrics)) / len(phc_metrics)
                 avg_risk = min(avg_risk, 100.0)  # Cap at 100%
             else:
                 avg_risk = 0.0
 
             return Response({
                 'global_model': {
-                    'version': latest_global.version if latest_global else 0,
+                    'version': latest_global['version'] if latest_global else 0,
                     'accuracy': round(global_accuracy, 4),
                     'contributors': contributors,
                     'total_contributors': len(contributors),
@@ -814,23 +1034,23 @@ class SurveillanceDashboardMetricsView(APIView):
                     status_code=status.HTTP_403_FORBIDDEN
                 )[0]
             
-            # Get alerts from last 30 days
+            # Get alerts from last 30 days (materialized once, reused below)
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            recent_alerts = Alert.objects.filter(
+            recent_alerts = list(Alert.objects.filter(
                 created_at__gte=thirty_days_ago
-            ).order_by('created_at')
+            ).order_by('created_at').only(*ALERT_LIST_FIELDS).as_pymongo())
             
             # Outbreak trend (daily aggregation)
             trend_data = {}
             for alert in recent_alerts:
-                date_key = alert.created_at.strftime('%Y-%m-%d')
+                date_key = alert['created_at'].strftime('%Y-%m-%d')
                 if date_key not in trend_data:
                     trend_data[date_key] = {'count': 0, 'high': 0, 'critical': 0}
                 
                 trend_data[date_key]['count'] += 1
-                if alert.severity == 'CRITICAL':
+                if alert.get('severity') == 'CRITICAL':
                     trend_data[date_key]['critical'] += 1
-                elif alert.severity == 'HIGH':
+                elif alert.get('severity') == 'HIGH':
                     trend_data[date_key]['high'] += 1
             
             outbreak_trend = [{
@@ -842,30 +1062,33 @@ class SurveillanceDashboardMetricsView(APIView):
             
             # Alert history
             alert_history = [{
-                'id': str(a.id),
-                'phc_id': a.phc_id,
-                'type': a.alert_type,
-                'severity': a.severity,
-                'risk_score': round(float(a.risk_score), 2),
-                'created_at': a.created_at.isoformat()
-            } for a in recent_alerts.order_by('-created_at')[:100]]
+                'id': str(a['_id']),
+                'phc_id': a['phc_id'],
+                'type': a.get('alert_type', 'FEVER_OUTBREAK'),
+                'severity': a.get('severity', 'MEDIUM'),
+                'risk_score': round(float(a['risk_score']), 2),
+                'created_at': a['created_at'].isoformat()
+            } for a in recent_alerts[::-1][:100]]
             
             # Heatmap (PHC-based)
             heatmap_data = {}
-            phc_ids = set([u.phc_id for u in User.objects.filter(role='PHC_USER') if u.phc_id])
+            phc_ids = [phc_id for phc_id in User.objects.filter(role='PHC_USER').distinct('phc_id') if phc_id]
+            
+            alerts_by_phc = {}
+            for a in recent_alerts:
+                alerts_by_phc.setdefault(a['phc_id'], []).append(a)
             
             for phc_id in phc_ids:
-                phc_alerts = Alert.objects.filter(phc_id=phc_id, created_at__gte=thirty_days_ago)
+                phc_alerts = alerts_by_phc.get(phc_id, [])
                 
-                if phc_alerts.count() > 0:
-                    avg_risk = sum(float(a.risk_score) for a in phc_alerts) / len(phc_alerts)
+                if phc_alerts:
+                    avg_risk = sum(float(a['risk_score']) for a in phc_alerts) / len(phc_alerts)
                     
                     # Count severity distribution
+                    severity_counts = Counter(a.get('severity', 'MEDIUM') for a in phc_alerts)
                     severity_dist = {
-                        'CRITICAL': sum(1 for a in phc_alerts if a.severity == 'CRITICAL'),
-                        'HIGH': sum(1 for a in phc_alerts if a.severity == 'HIGH'),
-                        'MEDIUM': sum(1 for a in phc_alerts if a.severity == 'MEDIUM'),
-                        'LOW': sum(1 for a in phc_alerts if a.severity == 'LOW'),
+                        severity: severity_counts[severity]
+                        for severity in ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
                     }
                     
                     # Determine highest severity
@@ -878,17 +1101,17 @@ class SurveillanceDashboardMetricsView(APIView):
                         highest_severity = 'MEDIUM'
                     
                     heatmap_data[phc_id] = {
-                        'alert_count': phc_alerts.count(),
+                        'alert_count': len(phc_alerts),
                         'avg_risk_score': round(avg_risk, 2),
                         'severity_distribution': severity_dist,
                         'highest_severity': highest_severity
                     }
             
             # Summary
-            critical_alerts = sum(1 for a in recent_alerts if a.severity == 'CRITICAL')
-            high_alerts = sum(1 for a in recent_alerts if a.severity == 'HIGH')
+            critical_alerts = sum(1 for a in recent_alerts if a.get('severity') == 'CRITICAL')
+            high_alerts = sum(1 for a in recent_alerts if a.get('severity') == 'HIGH')
             if recent_alerts:
-                avg_risk = sum(float(a.risk_score) for a in recent_alerts) / len(list(recent_alerts))
+                avg_risk = sum(float(a['risk_score']) for a in recent_alerts) / len(recent_alerts)
                 avg_risk = min(avg_risk, 100.0)  # Cap at 100%
             else:
                 avg_risk = 0.0
@@ -897,7 +1120,7 @@ class SurveillanceDashboardMetricsView(APIView):
 
             return Response({
                 'summary': {
-                    'total_alerts': len(list(recent_alerts)),
+                    'total_alerts': len(recent_alerts),
                     'critical_alerts': critical_alerts,
                     'high_alerts': high_alerts,
                     'average_risk_score': round(avg_risk, 2),
@@ -994,8 +1217,7 @@ class CohortHistoryView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Fetch historical snapshots using PyMongo to avoid schema cache issues
-            from pymongo import MongoClient
-            client = MongoClient('mongodb://localhost:27017/')
+            client = raw_mongo_client()
             # Try 'fedhealth' first (where mongoengine writes), then fall back to 'fedhealth_db'
             db = client['fedhealth']
             
@@ -1068,56 +1290,29 @@ class CohortHistoryView(APIView):
             
             # Calculate metrics from raw document dictionaries
             total = len(patient_list)
-            fever_count = sum(1 for p in patient_list if p.get('fever') == 1)
-            cough_count = sum(1 for p in patient_list if p.get('cough') == 1)
-            fatigue_count = sum(1 for p in patient_list if p.get('fatigue') == 1)
-            headache_count = sum(1 for p in patient_list if p.get('headache') == 1)
-            vomiting_count = sum(1 for p in patient_list if p.get('vomiting') == 1)
-            breathlessness_count = sum(1 for p in patient_list if p.get('breathlessness') == 1)
-            male_count = sum(1 for p in patient_list if p.get('gender') == 'Male')
-            high_severity_count = sum(1 for p in patient_list if p.get('severity_level') == 'High')
-            
-            # Calculate averages (handle missing values)
-            ages = [p.get('age') for p in patient_list if p.get('age')]
-            avg_age = sum(ages) / len(ages) if ages else 0
-            
-            temps = [p.get('temperature_c') for p in patient_list if p.get('temperature_c')]
-            avg_temp = sum(temps) / len(temps) if temps else 0
-            
-            hrs = [p.get('heart_rate') for p in patient_list if p.get('heart_rate')]
-            avg_hr = sum(hrs) / len(hrs) if hrs else 0
-            
-            bps = [p.get('bp_systolic') for p in patient_list if p.get('bp_systolic')]
-            avg_bp = sum(bps) / len(bps) if bps else 0
-            
-            wbcs = [p.get('wbc_count') for p in patient_list if p.get('wbc_count')]
-            avg_wbc = sum(wbcs) / len(wbcs) if wbcs else 0
-            
-            platelets = [p.get('platelet_count') for p in patient_list if p.get('platelet_count')]
-            avg_platelet = sum(platelets) / len(platelets) if platelets else 0
-            
-            hbs = [p.get('hemoglobin') for p in patient_list if p.get('hemoglobin')]
-            avg_hb = sum(hbs) / len(hbs) if hbs else 0
+            symptom_counts, averages = compute_cohort_feature_stats(patient_list)
+            male_count = [p.get('gender') for p in patient_list].count('Male')
+            high_severity_count = [p.get('severity_level') for p in patient_list].count('High')
             
             # Create snapshot
             snapshot = CohortSnapshot.objects.create(
                 phc_id=phc_id,
                 total_patients=total,
-                average_age=round(avg_age, 2),
+                average_age=round(averages['age'], 2),
                 male_percentage=round((male_count / total) * 100, 2),
                 female_percentage=round((1 - male_count / total) * 100, 2),
-                fever_percentage=round((fever_count / total) * 100, 2),
-                cough_percentage=round((cough_count / total) * 100, 2),
-                fatigue_percentage=round((fatigue_count / total) * 100, 2),
-                headache_percentage=round((headache_count / total) * 100, 2),
-                vomiting_percentage=round((vomiting_count / total) * 100, 2),
-                breathlessness_percentage=round((breathlessness_count / total) * 100, 2),
-                average_wbc_count=round(avg_wbc, 0),
-                average_temperature_c=round(avg_temp, 2),
-                average_heart_rate=round(avg_hr, 2),
-                average_bp_systolic=round(avg_bp, 2),
-                average_platelet_count=round(avg_platelet, 0),
-                average_hemoglobin=round(avg_hb, 2),
+                fever_percentage=round((symptom_counts['fever'] / total) * 100, 2),
+                cough_percentage=round((symptom_counts['cough'] / total) * 100, 2),
+                fatigue_percentage=round((symptom_counts['fatigue'] / total) * 100, 2),
+                headache_percentage=round((symptom_counts['headache'] / total) * 100, 2),
+                vomiting_percentage=round((symptom_counts['vomiting'] / total) * 100, 2),
+                breathlessness_percentage=round((symptom_counts['breathlessness'] / total) * 100, 2),
+                average_wbc_count=round(averages['wbc_count'], 0),
+                average_temperature_c=round(averages['temperature_c'], 2),
+                average_heart_rate=round(averages['heart_rate'], 2),
+                average_bp_systolic=round(averages['bp_systolic'], 2),
+                average_platelet_count=round(averages['platelet_count'], 0),
+                average_hemoglobin=round(averages['hemoglobin'], 2),
                 high_severity_percentage=round((high_severity_count / total) * 100, 2),
                 disease_distribution=self._calculate_disease_distribution(patient_list)
             )
@@ -8,6 +8,20 @@ SECRET_KEY = config('SECRET_KEY', default='django-insecure-fedhealth-secret-key-
 
 DEBUG = config('DEBUG', default=True, cast=bool)
 
+# bcrypt work factor for password hashing (library default is 12)
+BCRYPT_ROUNDS = config('BCRYPT_ROUNDS', default=12, cast=int)
+
+# JWT signing: 'HS256' (shared SECRET_KEY) or 'EdDSA' (Ed25519 key pair, PEM)
+JWT_ALGORITHM = config('JWT_ALGORITHM', default='HS256')
+JWT_PRIVATE_KEY = config('JWT_PRIVATE_KEY', default='').replace('\\n', '\n')
+JWT_PUBLIC_KEY = config('JWT_PUBLIC_KEY', default='').replace('\\n', '\n')
+
+# Store the calculation breakdown in Alert.details for analytics alerts
+ALERT_INCLUDE_DETAILS = config('ALERT_INCLUDE_DETAILS', default=True, cast=bool)
+
+# Run 5-fold cross-validation after each local training (five extra model fits)
+TRAINING_CROSS_VALIDATION = config('TRAINING_CROSS_VALIDATION', default=False, cast=bool)
+
 ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
@@ -85,6 +99,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # JSON only: TEMPLATES is empty, so the browsable API cannot render anyway
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+    ],
 }
 
 # MongoDB Atlas Connection
@@ -27,6 +27,7 @@ urlpatterns = [
     # Patient Management
     path('api/phc/patient/', views.PatientSubmitView.as_view(), name='patient-submit'),
     path('api/phc/patients/', views.PHCPatientsView.as_view(), name='phc-patients'),
+    path('api/phc/patients/batch/', views.BatchPatientSubmitView.as_view(), name='patient-batch-submit'),
     
     # Federated Learning
     path('api/admin/aggregate/', views.AggregateModelsView.as_view(), name='aggregate-models'),
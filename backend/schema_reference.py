@@ -98,7 +98,6 @@ schema_definitions = {
             "last_training_at": ("DateTime", "Last training timestamp or null"),
             "patients_since_last_training": ("Integer", "Count of new patients"),
             "last_aggregated_version": ("Integer", "Last global version aggregated"),
-            "training_in_progress": ("Boolean", "Prevent duplicate training"),
             "updated_at": ("DateTime", "Last update timestamp"),
         },
         "indexes": ["phc_id"],
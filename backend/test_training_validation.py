@@ -42,14 +42,14 @@ print("\n" + "-"*90)
 print("TEST 1: Data Preprocessing & Feature Engineering")
 print("-"*90)
 
-patients = list(Patient.objects.filter(phc_id=TEST_PHC))
 feature_columns = ['fever', 'cough', 'rash', 'wbc_count']
+patients = list(Patient.objects.filter(phc_id=TEST_PHC).as_pymongo())
 
-X, y, features = preprocess_data(patients, feature_columns)
+X, y, label_encoder, features = preprocess_data(patients, feature_columns)
 
 print(f"✓ Loaded {len(patients)} patients")
 print(f"✓ Feature matrix shape: {X.shape}")
-print(f"✓ Label distribution: {dict(zip(*np.unique(y, return_counts=True)))}")
+print(f"✓ Label distribution: {dict(zip(label_encoder.classes_, np.bincount(y)))}")
 print(f"✓ Features used: {features}")
 print(f"✓ Diagnosis NOT in features: {'diagnosis' not in features}")
 
@@ -64,7 +64,7 @@ print("\n" + "-"*90)
 print("TEST 2: Model Training with Comprehensive Validation")
 print("-"*90)
 
-model_result = train_local_model(X, y, feature_columns)
+model_result = train_local_model(X, y, label_encoder, feature_columns)
 
 if 'error' in model_result:
     print(f"✗ Training error: {model_result['error']}")